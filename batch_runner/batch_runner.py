@@ -1,15 +1,24 @@
-import os, sys, json, time, shutil
+import os, sys, json, gzip, shutil, threading, time
+from collections import deque
+import xml.etree.ElementTree as ET
+from functools import partial
 from pathlib import Path
 
-import pandas as pd
-from paramiko import SSHClient, AutoAddPolicy
-from scp import SCPClient
-
 project_path = os.path.abspath(os.path.join(os.getcwd(), "."))
 if project_path not in sys.path:
     sys.path.insert(0, project_path)
     
-from lib.cooja_files import convert_simulation_files, convert_cooja_log_to_csv
+from lib.cooja_files import convert_simulation_files
+from lib.csv_converter import CoojaLogParser, SimLogDemux, iter_gzip_lines, write_results
+from lib.executors import SSHExecutor, LocalExecutor, StubExecutor
+from lib.manifest import DONE, Manifest, job_key, copy_results
+from lib.metrics import evaluate, write_metrics
+from lib.objectives import ObjectiveAccumulator
+from lib.parse_json_pos_dat import FIXED_POSITIONS, MobilityCache
+from lib.pareto import ParetoFront
+from lib.replication import AdaptiveReplication, replicate_name, split_replicate
+from lib.scheduler import IDLE, Scheduler, Worker
+from lib.ssh_pool import SSHPool
 
 # ============================================================
 # Hardcoded parameters
@@ -18,48 +27,131 @@ from lib.cooja_files import convert_simulation_files, convert_cooja_log_to_csv
 INPUT_DIR = Path("./input")
 OUTPUT_DIR = Path("./output")
 
-REMOTE_HOST = "localhost"
-REMOTE_PORT = 2230
-REMOTE_USER = "root"
-REMOTE_PASS = "root"
+# Completed and pending jobs, keyed by content; lets an interrupted batch resume
+MANIFEST_PATH = OUTPUT_DIR / "manifest.json"
+
+# Non-dominated set of every finished simulation, updated as results arrive
+PARETO_PATH = OUTPUT_DIR / "pareto.json"
+
+# Streaming mode: keep watching INPUT_DIR for new JSONs (e.g. written by the
+# MILP sweep with `runner.py --export-dir`) until SWEEP_DONE appears, so
+# simulations start while the solver is still running. Both markers name the
+# sweep: a SWEEP_DONE already consumed by an earlier streaming run (recorded in
+# SWEEP_CONSUMED) does not end this one. The producer keeps the mtime of
+# SWEEP_RUNNING fresh; the run fails when that heartbeat is older than
+# STREAM_STALE, when SWEEP_RUNNING disappears without a new SWEEP_DONE, or when
+# no sweep shows up within STREAM_START_TIMEOUT.
+STREAM_INPUTS = False
+SWEEP_DONE = INPUT_DIR / "sweep.done"
+SWEEP_RUNNING = INPUT_DIR / "sweep.running"
+SWEEP_CONSUMED = OUTPUT_DIR / "sweep.consumed"
+STREAM_POLL = 5.0
+STREAM_STALE = 60.0
+STREAM_START_TIMEOUT = 600.0
+
+# Execution backend:
+#   "ssh"   -> Cooja containers reached over SSH (WORKERS)
+#   "local" -> Cooja as a local subprocess (LOCAL_COOJA_DIR)
+#   "stub"  -> replays recorded test logs from STUB_LOGS_DIR, no Cooja at all
+EXECUTOR = "ssh"
+
+# Cooja containers: jobs go to the least-loaded worker with a free slot.
+WORKERS = [
+    {"host": "localhost", "port": 2230, "user": "root", "password": "root", "concurrency": 1},
+]
+
+# MaxSessions of the workers' sshd (OpenSSH default: 10). Every job dispatched
+# to a worker (concurrency plus prefetch) holds up to two SSH channels, so
+# concurrency above 4 needs a higher MaxSessions on that container.
+SSH_MAX_SESSIONS = 10
+
+# Slots used by the local and stub backends
+LOCAL_CONCURRENCY = 1
 
 REMOTE_COOJA_DIR = "/opt/contiki-ng/tools/cooja"
 
+# Each job runs in its own scratch directory below REMOTE_JOBS_DIR, holding its
+# simulation.csc, positions.dat and COOJA.testlog, so jobs never share files.
+REMOTE_JOBS_DIR = f"{REMOTE_COOJA_DIR}/jobs"
+
+# Cooja resolves [CONFIG_DIR] to the directory of the loaded .csc
+REMOTE_POSITIONS = "[CONFIG_DIR]/positions.dat"
+
 JAVA_CMD = (
     "/opt/java/openjdk/bin/java --enable-preview "
     "-Xms4g -Xmx4g "
-    "-jar build/libs/cooja.jar --no-gui simulation.csc"
+    f"-jar {REMOTE_COOJA_DIR}/build/libs/cooja.jar --no-gui"
 )
 
+LOCAL_COOJA_DIR = Path("/opt/contiki-ng/tools/cooja")
+LOCAL_JOBS_DIR = Path("./tmp/jobs")
+LOCAL_JAVA_CMD = f"java --enable-preview -Xms4g -Xmx4g -jar {LOCAL_COOJA_DIR}/build/libs/cooja.jar --no-gui"
+
+# Recorded logs (<name>.testlog, <name>/COOJA.testlog or <name>/sim.log.gz);
+# keep them outside OUTPUT_DIR, which is rewritten while they are replayed.
+STUB_LOGS_DIR = Path("./recorded")
+STUB_STARTUP_DELAY = 0.0
+STUB_SIM_DELAY = 0.0
+
+# Simulations run back to back by one Cooja JVM. Each .csc sits in its own
+# subdirectory of the batch directory; the script's [Sim] begin/end markers
+# split the shared test log back into one log per simulation.
+JOBS_PER_JVM = 1
+
+# Watchdog: a JVM is killed after WATCHDOG_GRACE seconds plus WATCHDOG_FACTOR
+# times the simulated duration of its jobs; failed batches are retried up to
+# RETRIES times on another worker, waiting RETRY_BACKOFF * 2**n seconds.
+WATCHDOG_FACTOR = 3.0
+WATCHDOG_GRACE = 120.0
+RETRIES = 2
+RETRY_BACKOFF = 10.0
+
+# Per-simulation results go to sim.parquet (typed columns, zstd) when pyarrow
+# is installed; sim.csv is written as well when EXPORT_CSV is set.
+EXPORT_CSV = False
+
 TEMPLATE_XML = Path("./simulation_template.xml")
 
+# Replication: with MAX_REPLICATES > 1 each design runs as jobs <name>/rep-<k>
+# with Cooja seed SEED_BASE + k (the same seeds for every design), results in
+# OUTPUT_DIR/<name>/rep-<k>/. A design starts with MIN_REPLICATES runs and gets
+# more only while some objective's CONFIDENCE interval is wider than
+# REL_PRECISION of its mean and no other design dominates it beyond the
+# intervals. OUTPUT_DIR/<name>/objectives.json then holds the means, and
+# replicates.json the intervals and samples. MAX_REPLICATES = 1 runs each
+# design once with the template's seed, as before.
+MAX_REPLICATES = 1
+MIN_REPLICATES = 3
+CONFIDENCE = 0.95
+REL_PRECISION = 0.05
+SEED_BASE = 123456
+
 LOCAL_TMP = Path("./tmp")
 LOCAL_TMP.mkdir(exist_ok=True)
 
+# Designs of a batch usually share their mobile motes: each distinct mobility
+# block of positions.dat is generated once, uploaded once per worker and
+# re-indexed per job after the job's fixed motes. LOCAL_TMP/<name> therefore
+# only holds the fixed part (FIXED_POSITIONS); the complete positions.dat is
+# assembled in the job's scratch directory.
+MOBILITY = MobilityCache(LOCAL_TMP / "mobility")
+
 # ============================================================
-# SSH helpers
+# Executors
 # ============================================================
 
-def create_ssh() -> SSHClient:
-    ssh = SSHClient()
-    ssh.set_missing_host_key_policy(AutoAddPolicy())
-    ssh.connect(
-        REMOTE_HOST,
-        port=REMOTE_PORT,
-        username=REMOTE_USER,
-        password=REMOTE_PASS,
-    )
-    return ssh
-
-
-def scp_send(ssh: SSHClient, local: Path, remote: str):
-    with SCPClient(ssh.get_transport()) as scp:
-        scp.put(str(local), remote)
-
-
-def scp_get(ssh: SSHClient, remote: str, local: Path):
-    with SCPClient(ssh.get_transport()) as scp:
-        scp.get(remote, str(local))
+def make_executor(kind: str = EXECUTOR):
+    """Returns (executor, workers) for the configured backend."""
+    if kind == "ssh":
+        # One authenticated connection per worker, shared by all of its jobs
+        return SSHExecutor(SSHPool(max_sessions=SSH_MAX_SESSIONS), REMOTE_JOBS_DIR, JAVA_CMD), WORKERS
+    local = [Worker(host="localhost", concurrency=LOCAL_CONCURRENCY, name=kind)]
+    if kind == "local":
+        LOCAL_JOBS_DIR.mkdir(parents=True, exist_ok=True)
+        return LocalExecutor(LOCAL_JOBS_DIR.resolve(), LOCAL_JAVA_CMD), local
+    if kind == "stub":
+        return StubExecutor(STUB_LOGS_DIR, STUB_STARTUP_DELAY, STUB_SIM_DELAY), local
+    raise ValueError(f"unknown executor: {kind}")
 
 
 # ============================================================
@@ -68,131 +160,384 @@ def scp_get(ssh: SSHClient, remote: str, local: Path):
 
 def build_cooja_simulation_from_json(
     json_path: Path,
-    out_dir: Path
+    out_dir: Path,
+    random_seed: int | None = None
 ) -> dict[str, Path]:
     out_dir.mkdir(parents=True, exist_ok=True)
 
     out_csc = out_dir / "simulation.csc"
-    out_dat = out_dir / "positions.dat"
+    out_dat = out_dir / FIXED_POSITIONS
 
     with open(json_path, "r") as f:
         sim_config = json.load(f)
 
-    convert_simulation_files(
+    mobility = convert_simulation_files(
         sim_config,
         TEMPLATE_XML,
         out_csc,
-        out_dat
+        out_dat,
+        positions_path=REMOTE_POSITIONS,
+        mobility=MOBILITY,
+        random_seed=random_seed,
     )
 
     return {
         "csc": out_csc,
         "positions": out_dat if out_dat.exists() else None,
+        "mobility": mobility["mobility"],
+        "mobility_offset": mobility["mobility_offset"],
+        "duration": float(sim_config["duration"]),
     }
 
 
-# ============================================================
-# Objective computations
-# ============================================================
+def prepare_job(json_file: Path, name: str, random_seed: int | None = None) -> dict[str, Path]:
+    build_dir = LOCAL_TMP / name
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
+    return build_cooja_simulation_from_json(json_file, build_dir, random_seed)
 
-def mean(series: pd.Series) -> float:
-    s = pd.to_numeric(series, errors="coerce").dropna()
-    return float(s.mean()) if len(s) else float("nan")
 
+def firmware_sources() -> list[str]:
+    """Firmware sources Cooja compiles on the workers, as listed in the template."""
+    root = ET.parse(TEMPLATE_XML).getroot()
+    return [el.text.strip() for el in root.findall(".//motetype/source") if el.text]
 
-def sum_all(df: pd.DataFrame, value_col: str) -> float:
-    if value_col not in df.columns:
-        return float("nan")
-    s = pd.to_numeric(df[value_col], errors="coerce")
-    return float(s.sum(skipna=True))
 
+def firmware_identity(executor, workers: list[Worker]) -> str:
+    """Hash of the firmware sources; every worker must build the same firmware."""
+    sources = firmware_sources()
+    ids = {w.name: executor.firmware_id(w, sources) for w in workers}
+    if len(set(ids.values())) > 1:
+        raise RuntimeError(f"workers have different firmware sources: {ids}")
+    return next(iter(ids.values()))
 
-def sum_last_minus_first(
-    df: pd.DataFrame,
-    value_col: str,
-    node_col: str = "node",
-    time_col: str = "root_time_now",
-) -> float:
-    if value_col not in df.columns:
-        return float("nan")
 
-    df_sorted = df.sort_values([node_col, time_col])
-    g = df_sorted.groupby(node_col)[value_col]
+# ============================================================
+# Main pipeline
+# ============================================================
 
-    start = pd.to_numeric(g.first(), errors="coerce")
-    end = pd.to_numeric(g.last(), errors="coerce")
+def finalize_simulation(out_dir: Path, parser: CoojaLogParser, accumulator: ObjectiveAccumulator) -> dict[str, float]:
+    # objectives were accumulated while the log streamed in; the results are only
+    # stored, with every registered metric (lib/metrics.py) in metrics.json
+    df = parser.to_dataframe()
+    write_results(df, out_dir, csv=EXPORT_CSV)
+    write_metrics(out_dir, evaluate(df))
 
-    per_node = (end - start).clip(lower=0)
-    return float(per_node.sum(skipna=True))
+    objectives = accumulator.result()
 
+    with open(out_dir / "objectives.json", "w") as f:
+        json.dump(objectives, f, indent=2)
 
-def compute_objectives(csv_path: Path) -> dict[str, float]:
-    df = pd.read_csv(csv_path)
+    return objectives
 
-    return {
-        "latency": mean(df["rtt_latency"]) if "rtt_latency" in df.columns else float("nan"),
-        "energy": sum_all(df, "total_energy_mj"),
-        "throughput": sum_last_minus_first(
-            df,
-            value_col="server_received",
-            node_col="node",
-            time_col="root_time_now",
-        ),
-    }
 
+def batch_label(jobs: list[tuple[str, dict]]) -> str:
+    return ", ".join(name for name, _ in jobs)
 
-# ============================================================
-# Main pipeline
-# ============================================================
 
-def run_simulation(json_file: Path):
-    name = json_file.stem
-    out_dir = OUTPUT_DIR / name
-    out_dir.mkdir(parents=True, exist_ok=True)
+def run_batch(executor, jobs: list[tuple[str, dict]], worker: Worker) -> list[dict[str, float]]:
+    """Runs the prepared jobs (name, files) in a single Cooja JVM on worker and
+    returns their objectives, in the same order."""
+    names = [name for name, _ in jobs]
+    print(f"running {batch_label(jobs)} @ {worker.name}")
 
-    build_dir = LOCAL_TMP / name
-    if build_dir.exists():
-        shutil.rmtree(build_dir)
+    out_dirs = [OUTPUT_DIR / name for name in names]
+    for out_dir in out_dirs:
+        out_dir.mkdir(parents=True, exist_ok=True)
 
-    files = build_cooja_simulation_from_json(json_file, build_dir)
+    accumulators = [ObjectiveAccumulator() for _ in jobs]
+    parsers = [CoojaLogParser(observers=[acc]) for acc in accumulators]
+    demux = SimLogDemux(parsers, names=names)
 
-    ssh = create_ssh()
-    try:
-        scp_send(ssh, files["csc"], f"{REMOTE_COOJA_DIR}/simulation.csc")
-        if files.get("positions"):
-            scp_send(ssh, files["positions"], f"{REMOTE_COOJA_DIR}/positions.dat")
+    # simulated duration is given in minutes
+    deadline = WATCHDOG_GRACE + WATCHDOG_FACTOR * 60.0 * sum(files["duration"] for _, files in jobs)
+    expired = threading.Event()
 
-        cmd = f"cd {REMOTE_COOJA_DIR} && {JAVA_CMD}"
-        stdin, stdout, stderr = ssh.exec_command(cmd, get_pty=True)
+    # upload happens outside the worker's run slot; the watchdog starts with Cooja
+    with executor.start(worker, jobs, names[0].replace("/", "-"), gate=worker.run_slot()) as execution:
+        def expire():
+            expired.set()
+            execution.kill()
 
-        while not stdout.channel.exit_status_ready():
-            time.sleep(0.2)
+        watchdog = threading.Timer(deadline, expire)
+        watchdog.daemon = True
+        watchdog.start()
 
-        log_path = out_dir / "sim.log"
-        scp_get(ssh, f"{REMOTE_COOJA_DIR}/COOJA.testlog", log_path)
+        logs = [gzip.open(d / "sim.log.gz", "wt", encoding="utf-8", compresslevel=1) for d in out_dirs]
+        try:
+            demux.logs = logs
+            for line in iter_gzip_lines(execution.chunks):
+                demux.feed(line)
+        except Exception:
+            execution.kill()  # e.g. a log marked for another job: stop Cooja before leaving
+            raise
+        finally:
+            watchdog.cancel()
+            for log in logs:
+                log.close()
 
-    finally:
-        ssh.close()
+        if expired.is_set():
+            raise TimeoutError(f"{', '.join(names)} exceeded {deadline:.0f}s @ {worker.name}")
 
-    csv_path = out_dir / "sim.csv"
-    convert_cooja_log_to_csv(log_path, csv_path)
+        status = execution.wait()
 
-    objectives = compute_objectives(csv_path)
+    # a partial log must never become a cached result: the whole batch is
+    # retried (or reported as failed) by the scheduler
+    if demux.started < len(jobs):
+        missing = names[demux.started:]
+        raise RuntimeError(f"cooja did not start {', '.join(missing)} @ {worker.name} (exit status {status})")
+    if demux.ended < len(jobs):
+        unfinished = names[demux.ended:]
+        raise RuntimeError(f"cooja did not finish {', '.join(unfinished)} @ {worker.name} (exit status {status})")
+    if status != 0:
+        raise RuntimeError(f"cooja exited with status {status} running {', '.join(names)} @ {worker.name}")
 
-    with open(out_dir / "objectives.json", "w") as f:
-        json.dump(objectives, f, indent=2)
-
-    print(f"[OK] {name} -> {objectives}")
+    return [finalize_simulation(d, p, a) for d, p, a in zip(out_dirs, parsers, accumulators)]
 
 
-def main():
+def read_marker(path: Path) -> dict | None:
+    """A sweep marker written by runner.py, None when absent (an empty legacy marker is {})."""
+    try:
+        text = path.read_text()
+    except FileNotFoundError:
+        return None
+    return json.loads(text) if text.strip() else {}
+
+
+def input_files():
+    """Input JSONs in name order. In streaming mode new files are picked up as
+    they appear (IDLE while none is ready) until the sweep's SWEEP_DONE exists;
+    a dead or failed producer raises RuntimeError."""
+    if not STREAM_INPUTS:
+        yield from sorted(INPUT_DIR.glob("*.json"))
+        return
+
+    consumed = SWEEP_CONSUMED.read_text() if SWEEP_CONSUMED.exists() else None
+
+    def done_sweep():
+        done = read_marker(SWEEP_DONE)
+        return None if done is None or done.get("sweep", "") == consumed else done.get("sweep", "")
+
+    seen, producer, since = set(), None, time.monotonic()
+    while True:
+        # checked before listing: files written before the marker are never missed
+        finished = done_sweep()
+        new = sorted(p for p in INPUT_DIR.glob("*.json") if p.name not in seen)
+        for json_file in new:
+            seen.add(json_file.name)
+            yield json_file
+        if new:
+            continue
+        if finished is not None:
+            SWEEP_CONSUMED.write_text(finished)
+            return
+
+        running = read_marker(SWEEP_RUNNING)
+        if running is not None:
+            producer = running
+            try:
+                age = time.time() - SWEEP_RUNNING.stat().st_mtime
+            except FileNotFoundError:
+                continue  # just finished or failed: look again
+            if age > STREAM_STALE:
+                raise RuntimeError(f"sweep {running.get('sweep')} (pid {running.get('pid')}) has not updated "
+                                   f"{SWEEP_RUNNING} for {age:.0f}s: the producer is gone")
+        elif producer is not None:
+            # the producer writes SWEEP_DONE before removing SWEEP_RUNNING
+            if done_sweep() is None:
+                raise RuntimeError(f"sweep {producer.get('sweep')} ended without {SWEEP_DONE}")
+            continue
+        elif time.monotonic() - since > STREAM_START_TIMEOUT:
+            raise RuntimeError(f"no sweep started within {STREAM_START_TIMEOUT:.0f}s ({SWEEP_RUNNING} missing)")
+        yield IDLE
+
+
+def main() -> int:
     OUTPUT_DIR.mkdir(exist_ok=True)
 
-    for json_file in sorted(INPUT_DIR.glob("*.json")):
-        print(f"running {json_file}")
-        run_simulation(json_file)
+    executor, workers = make_executor()
+    scheduler = Scheduler(workers, retries=RETRIES, backoff=RETRY_BACKOFF, poll=STREAM_POLL)
+    if isinstance(executor, SSHExecutor):
+        for worker in scheduler.workers:
+            executor.pool.check_capacity(worker)
+    firmware = firmware_identity(executor, scheduler.workers)
+    manifest = Manifest(MANIFEST_PATH)
+    keys, failures = {}, {}
+    interrupted = manifest.pending()
+    if interrupted:
+        print(f"[RESUME] {len(interrupted)} job(s) left pending by an interrupted run: {', '.join(interrupted)}")
+
+    replicated = MAX_REPLICATES > 1
+    replication = AdaptiveReplication(MIN_REPLICATES, MAX_REPLICATES, CONFIDENCE, REL_PRECISION)
+    sources: dict[str, Path] = {}  # design -> input JSON
+    followups: deque[str] = deque()  # replicate jobs requested by finished ones
+
+    front = ParetoFront(PARETO_PATH)
+    for name, entry in manifest.jobs.items():
+        # replicates reach the front through their design's means
+        if entry["status"] == DONE and "/" not in name:
+            front.add(name, entry["objectives"])
+
+    def update_front(name: str, objectives: dict[str, float]):
+        if front.add(name, objectives):
+            print(f"[PARETO] {name} joins the front ({len(front)} solution(s))")
+        front.save()
+
+    def settle(design: str):
+        """Once a design's replicates are all back: more of them, or its final objectives."""
+        if not replication.settled(design):
+            return
+        more = replication.next(design)
+        if more:
+            print(f"[REPLICATE] {design}: {len(replication.samples[design])} run(s), {len(more)} more")
+            followups.extend(replicate_name(design, k) for k in more)
+            return
+        summary = replication.summary(design, SEED_BASE)
+        if not summary["replicates"]:
+            print(f"[FAILED] {design}: no replicate finished")
+            return
+        objectives = replication.means(design)
+        (OUTPUT_DIR / design).mkdir(parents=True, exist_ok=True)
+        with open(OUTPUT_DIR / design / "replicates.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        with open(OUTPUT_DIR / design / "objectives.json", "w") as f:
+            json.dump(objectives, f, indent=2)
+        # a single-run result of the same name would no longer match objectives.json
+        manifest.jobs.pop(design, None)
+        print(f"[SETTLED] {design} after {summary['replicates']} run(s) ({summary['stopped']}) -> {objectives}")
+        update_front(design, objectives)
+
+    def job_done(name: str, objectives: dict[str, float]):
+        if not replicated:
+            update_front(name, objectives)
+            return
+        design, k = split_replicate(name)
+        replication.add(design, k, objectives)
+        settle(design)
+
+    def job_failed(name: str, error: Exception):
+        failures[name] = error
+        if replicated:
+            design, k = split_replicate(name)
+            replication.failed(design, k)
+            settle(design)
+
+    def plan_job(json_file: Path, name: str):
+        """(name, files) of a job to simulate, or None when it is cached or cannot be built."""
+        seed = SEED_BASE + split_replicate(name)[1] if replicated else None
+        try:
+            files = prepare_job(json_file, name, seed)
+        except Exception as e:
+            manifest.mark_failed(name, "", repr(e))
+            print(f"[FAILED] {name}: could not build simulation: {e!r}")
+            job_failed(name, e)
+            return None
+        key = job_key(json_file, files["csc"], files.get("positions"), files.get("mobility"),
+                      executor.identity, firmware)
+
+        if manifest.is_done(name, key) and (OUTPUT_DIR / name / "objectives.json").exists():
+            print(f"[CACHED] {name}")
+            if replicated:  # single runs are in the front already
+                job_done(name, manifest.jobs[name]["objectives"])
+            return None
+        done = manifest.find_done(key)
+        if done is not None and (OUTPUT_DIR / done / "objectives.json").exists():
+            copy_results(OUTPUT_DIR / done, OUTPUT_DIR / name)
+            manifest.mark_done(name, key, manifest.jobs[done]["objectives"])
+            print(f"[CACHED] {name} (same as {done})")
+            job_done(name, manifest.jobs[done]["objectives"])
+            return None
+
+        manifest.mark_pending(name, key)
+        keys[name] = key
+        return name, files
+
+    def plan_jobs():
+        """Jobs of every input and every follow-up replicate, built lazily; IDLE
+        while a follow-up may still come from a running replicate."""
+        def drain():
+            while followups:
+                name = followups.popleft()
+                job = plan_job(sources[split_replicate(name)[0]], name)
+                if job is not None:
+                    yield job
+
+        for json_file in input_files():
+            yield from drain()
+            if json_file is IDLE:
+                yield IDLE
+                continue
+            design = json_file.stem
+            sources[design] = json_file
+            names = [replicate_name(design, k) for k in replication.start(design)] if replicated else [design]
+            for name in names:
+                job = plan_job(json_file, name)
+                if job is not None:
+                    yield job
+        while True:
+            yield from drain()
+            if not replication.active():
+                return
+            yield IDLE
+
+    def plan_batches():
+        """Groups jobs into batches; the scheduler pulls the next batch only when
+        a worker has room, so building overlaps simulation."""
+        batch = []
+        for job in plan_jobs():
+            if job is IDLE:
+                # nothing new yet: run what is ready instead of waiting for a full batch
+                manifest.save()
+                if batch:
+                    yield batch
+                    batch = []
+                yield IDLE
+                continue
+            batch.append(job)
+            if len(batch) == JOBS_PER_JVM:
+                manifest.save()
+                yield batch
+                batch = []
+        manifest.save()
+        if batch:
+            yield batch
+
+    print(f"running {JOBS_PER_JVM} job(s) per JVM on {scheduler.slots} slots")
+    if replicated:
+        print(f"replicating each design {replication.min_replicates} to {replication.max_replicates} time(s)")
+
+    try:
+        for batch, worker, results, error in scheduler.run(plan_batches(), partial(run_batch, executor), batch_label):
+            if error is not None:
+                print(f"[FAILED] {batch_label(batch)} @ {worker.name}: {error!r}")
+                for name, _ in batch:
+                    manifest.mark_failed(name, keys[name], repr(error))
+                    job_failed(name, error)
+            else:
+                for (name, _), objectives in zip(batch, results):
+                    manifest.mark_done(name, keys[name], objectives)
+                    print(f"[OK] {name} @ {worker.name} -> {objectives}")
+                    job_done(name, objectives)
+            manifest.save()
+    finally:
+        executor.close()
+
+    front.save()
+    print(f"Pareto front: {', '.join(sorted(front.front)) or '(empty)'}")
+
+    if failures:
+        print(f"{len(failures)} job(s) failed:")
+        for name, error in failures.items():
+            print(f"  {name}: {error!r}")
+
+    if isinstance(executor, SSHExecutor):
+        for name, st in executor.pool.stats.items():
+            print(f"[ssh] {name}: {st['connects']} connection(s), {st['connect_time']:.3f}s in handshakes")
+
+    # non-zero exit status when a job failed, for callers such as workflow.py
+    return 1 if failures else 0
 
 
 if __name__ == "__main__":
     print("Cooja batch runner")
-    main()
+    sys.exit(main())
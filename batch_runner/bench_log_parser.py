@@ -0,0 +1,101 @@
+"""
+Benchmark of the Cooja log parser (lib/csv_converter.py) against the
+previous regex + json.loads + list-of-dicts implementation.
+
+The test log is synthesized from existing sim.csv results (by default the
+~440k rows in data/simulation/milp-mobile/output), written back as sink
+lines '[Mote:1] {json}' interleaved with output from other motes.
+
+    python bench_log_parser.py [--source DIR] [--noise 2] [--repeat 3]
+"""
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from lib.csv_converter import cooja_log_to_csv
+
+DEFAULT_SOURCE = Path(__file__).resolve().parent.parent / "data/simulation/milp-mobile/output"
+
+
+def legacy_cooja_log_to_csv(cooja_log_input: Path, csv_output: Path) -> pd.DataFrame:
+    json_pattern = re.compile(r'\[Mote:1\].*?(\{.*?\})')
+    rows = []
+    with cooja_log_input.open(encoding="utf-8") as f:
+        for line in f:
+            m = json_pattern.search(line)
+            if not m:
+                continue
+            try:
+                rec = json.loads(m.group(1))
+            except json.JSONDecodeError:
+                continue
+            rows.append(rec)
+
+    df = pd.DataFrame(rows)
+    if not {"node", "root_time_now"} - set(df.columns):
+        df.sort_values(["node", "root_time_now"], inplace=True)
+    df.to_csv(csv_output, index=False)
+    return df
+
+
+def synthesize_log(source: Path, out: Path, noise: int) -> int:
+    """Writes a test log from every sim.csv below 'source'; returns the number of sink records."""
+    n = 0
+    with open(out, "w", encoding="utf-8") as f:
+        for csv_path in sorted(source.glob("*/sim.csv")):
+            df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+            cols = list(df.columns)
+            for values in df.itertuples(index=False):
+                rec = ", ".join(
+                    f'"{c}": "{v}"' if c == "node" else f'"{c}": {v}'
+                    for c, v in zip(cols, values)
+                )
+                f.write(f"[Mote:1] {{{rec}}}\n")
+                for k in range(noise):
+                    f.write(f"[Mote:{k + 2}] App: sending request {n}\n")
+                n += 1
+    return n
+
+
+def timed(fn, *args, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", type=Path, default=DEFAULT_SOURCE, help="directory with <run>/sim.csv")
+    ap.add_argument("--noise", type=int, default=2, help="lines from other motes per sink record")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        log = tmp / "COOJA.testlog"
+        n = synthesize_log(args.source, log, args.noise)
+        size = log.stat().st_size / 2**20
+        print(f"log: {n} sink records, {size:.1f} MiB")
+
+        t_old = timed(legacy_cooja_log_to_csv, log, tmp / "legacy.csv", repeat=args.repeat)
+        t_new = timed(cooja_log_to_csv, log, tmp / "new.csv", repeat=args.repeat)
+
+        same = (tmp / "legacy.csv").read_bytes() == (tmp / "new.csv").read_bytes()
+        print(f"legacy: {t_old:.2f}s  ({n / t_old:,.0f} rows/s)")
+        print(f"new:    {t_new:.2f}s  ({n / t_new:,.0f} rows/s)  x{t_old / t_new:.2f}")
+        print(f"identical CSV: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import os
 from pathlib import Path
 
-from .parse_json_pos_dat import generate_positions_from_json
+from .parse_json_pos_dat import generate_positions_from_json, generate_fixed_positions_from_json
 from .replace_xml import update_simulation_xml
 from .csv_converter import cooja_log_to_csv as _cooja_log_to_csv
 
@@ -9,15 +9,35 @@ def convert_simulation_files(
     config: dict, 
     template_file: str = "simulation_template.xml",
     outsim: str = "./output/simulation.xml",
-    outpos: str = "./output/positions.dat"
-    ):
-    """Processa a simulação completa a partir dos arquivos de configuração."""
+    outpos: str = "./output/positions.dat",
+    positions_path: str | None = None,
+    mobility=None,
+    random_seed: int | None = None
+    ) -> dict:
+    """Processa a simulação completa a partir dos arquivos de configuração.
+
+    positions_path: caminho do positions.dat gravado no plugin Mobility do .csc
+    (p.ex. "[CONFIG_DIR]/positions.dat"); None mantém o caminho do template.
+    mobility: MobilityCache opcional; com ele 'outpos' recebe só a parte fixa
+    (nomeie-o FIXED_POSITIONS, não positions.dat) e a parte móvel fica no bloco
+    compartilhado, a ser anexado com os índices deslocados de "mobility_offset"
+    (ver executors.positions_cmd).
+    random_seed: semente do Cooja gravada no .csc; None mantém a do template.
+    """
     
     # Gera arquivo de posições e obtém posições iniciais
-    fixed_positions, mobile_start_positions = generate_positions_from_json(
-        config["simulationElements"], 
-        output_filename=outpos
-    )
+    block = None
+    if mobility is None:
+        fixed_positions, mobile_start_positions = generate_positions_from_json(
+            config["simulationElements"], 
+            output_filename=outpos
+        )
+    else:
+        fixed_positions, mobile_start_positions, block = generate_fixed_positions_from_json(
+            config["simulationElements"],
+            mobility,
+            output_filename=outpos
+        )
     
     # Se não motes moveis remove o arquivo positions.dat pois este não é necessário
     if mobile_start_positions is None or len(mobile_start_positions) == 0:
@@ -35,8 +55,12 @@ def convert_simulation_files(
         tx_range=config["radiusOfReach"],
         interference_range=config["radiusOfInter"],
         input_file=template_file,
-        output_file=outsim
+        output_file=outsim,
+        positions_file=positions_path,
+        random_seed=random_seed
     )
-    
+
+    return {"mobility": block, "mobility_offset": len(fixed_positions)}
+
 def convert_cooja_log_to_csv(cooja_log_input: str, csv_output: str) -> None:
     _cooja_log_to_csv(Path(cooja_log_input), Path(csv_output))
\ No newline at end of file
@@ -1,34 +1,374 @@
+import gzip
 import json
-import re
+import zlib
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
-def cooja_log_to_csv(cooja_log_input: Path, csv_output: Path) -> pd.DataFrame:
-    # ------------------------- Expressões Regulares ----------------------------
-    json_pattern = re.compile(r'\[Mote:1\].*?(\{.*?\})')
+try:
+    import orjson
+    _fast_loads = orjson.loads
+except ImportError:  # orjson é opcional
+    _fast_loads = json.loads
 
-    # ---------------------- Leitura + Extração JSON ----------------------------
-    rows = []
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele os resultados ficam em CSV
+    pa = pq = None
 
-    with cooja_log_input.open(encoding="utf-8") as f:
-        for line in f:
-            m = json_pattern.search(line)
-            if not m:
+# Apenas o sink (mote 1) registra os JSONs de métricas no log
+LOG_MOTE_ID = 1
+LOG_TAG = f"[Mote:{LOG_MOTE_ID}]"
+
+# Marcadores gravados pelo script de teste no início e no fim de cada simulação;
+# separam o log quando várias simulações rodam em sequência na mesma JVM.
+SIM_TAG = "[Sim]"
+SIM_BEGIN = f"{SIM_TAG} begin"
+SIM_END = f"{SIM_TAG} end"
+# Nome do job nos marcadores: o .csc renderizado traz SIM_JOB, trocado pelo
+# nome quando o executor copia o .csc para o lote; assim o .csc em disco (e a
+# chave de cache do job) não depende do nome.
+SIM_JOB = "%JOB%"
+
+REQUIRED_COLUMNS = {"node", "root_time_now"}
+
+# Linhas acumuladas em listas Python antes de virarem arrays tipados
+CHUNK_ROWS = 65536
+
+# Resultados de uma simulação: Parquet tipado (preferido) ou CSV
+RESULTS_PARQUET = "sim.parquet"
+RESULTS_CSV = "sim.csv"
+PARQUET_COMPRESSION = "zstd"
+
+_INT_WIDTHS = (np.int8, np.int16, np.int32, np.int64)
+
+
+def mote_tag(mote_id: int) -> str:
+    return f"[Mote:{mote_id}]"
+
+
+def _loads(text: str):
+    try:
+        return _fast_loads(text)
+    except ValueError:
+        # p.ex. inteiros fora de 64 bits, que o orjson recusa
+        return json.loads(text)
+
+
+def _typed(values) -> pd.Series:
+    """Coluna tipada de um bloco; ints/floats puros vão direto para o numpy, o
+    resto usa a inferência do pandas (a mesma de pd.DataFrame(list[dict]))."""
+    types = set(map(type, values))
+    if types == {int}:
+        try:
+            return pd.Series(np.array(values, dtype=np.int64))
+        except OverflowError:
+            pass  # fora de int64: uint64 ou object, como o pandas decidir
+    elif types == {float} or types == {int, float}:
+        return pd.Series(np.array(values, dtype=np.float64))
+    return pd.Series(values)
+
+
+def _concat_column(parts: list[pd.Series]) -> pd.Series:
+    """Concatena os blocos de uma coluna com a mesma inferência de tipo do
+    DataFrame montado de uma vez (int64 + uint64 não negativos -> uint64)."""
+    if len(parts) == 1:
+        return parts[0]
+    dtypes = {p.dtype for p in parts}
+    if dtypes == {np.dtype("int64"), np.dtype("uint64")} and \
+            all(p.min() >= 0 for p in parts if p.dtype == np.int64):
+        parts = [p.astype(np.uint64) for p in parts]
+    return pd.concat(parts, ignore_index=True)
+
+
+class CoojaLogParser:
+    """
+    Parser incremental do log do Cooja: recebe linhas à medida que chegam
+    (arquivo local ou stream remoto) e acumula os registros JSON do mote
+    'mote_id' (o sink, por padrão).
+
+    Cada linha é descartada por uma busca simples pela tag do mote; o JSON é
+    delimitado por find() (o mesmo trecho que '\\{.*?\\}' casaria, sem regex) e
+    decodificado com orjson quando disponível. Cada registro vira uma tupla de
+    valores; a cada CHUNK_ROWS linhas o bloco é transposto em colunas tipadas.
+
+    'observers' recebem cada registro decodificado (observer.add(rec)), p.ex.
+    um ObjectiveAccumulator que calcula os objetivos durante a leitura.
+    """
+
+    def __init__(self, mote_id: int = LOG_MOTE_ID, chunk_rows: int = CHUNK_ROWS, observers=()):
+        self.tag = mote_tag(mote_id)
+        self.chunk_rows = max(1, chunk_rows)
+        self.observers = list(observers)
+        self.columns: list[str] = []          # ordem da primeira ocorrência
+        self._chunks: dict[str, dict[int, pd.Series]] = {}
+        self._chunk_lens: list[int] = []
+        # bloco atual: segmentos (chaves, linhas) de registros com as mesmas chaves
+        self._segments: list[tuple[tuple, list]] = []
+        self._keys = None
+        self._rows = None
+        self._buf_rows = 0
+
+    def __len__(self) -> int:
+        return sum(self._chunk_lens) + self._buf_rows
+
+    def feed(self, line: str) -> None:
+        i = line.find(self.tag)
+        if i < 0:
+            return
+        start = line.find("{", i + len(self.tag))
+        if start < 0:
+            return
+        end = line.find("}", start)
+        if end < 0:
+            return
+        try:
+            rec = _loads(line[start:end + 1])
+        except ValueError:
+            return
+        self.add(rec)
+
+    def feed_lines(self, lines) -> None:
+        """Equivalente a feed() para cada linha, com o laço todo em variáveis locais."""
+        tag, n_tag, loads = self.tag, len(self.tag), _loads
+        rows, keys_now = self._rows, self._keys
+        observers = self.observers
+        for line in lines:
+            i = line.find(tag)
+            if i < 0:
+                continue
+            start = line.find("{", i + n_tag)
+            if start < 0:
+                continue
+            end = line.find("}", start)
+            if end < 0:
                 continue
             try:
-                rec = json.loads(m.group(1))
-            except json.JSONDecodeError:
+                rec = loads(line[start:end + 1])
+            except ValueError:
                 continue
-            
-            rows.append(rec)
-
-    # -------------------------- DataFrame bruto --------------------------------
-    df = pd.DataFrame(rows)
-    
-    REQUIRED_COLUMNS = {"node", "root_time_now"}
-    missing = REQUIRED_COLUMNS - set(df.columns)
-    if not missing:
-        df.sort_values(["node", "root_time_now"], inplace=True)
-        
-    df.to_csv(csv_output, index=False)
-    return df
\ No newline at end of file
+            if rows is not None and tuple(rec) == keys_now and self._buf_rows < self.chunk_rows - 1:
+                rows.append(tuple(rec.values()))
+                self._buf_rows += 1
+                for observer in observers:
+                    observer.add(rec)
+            else:
+                self.add(rec)
+                rows, keys_now = self._rows, self._keys
+
+    def add(self, rec: dict) -> None:
+        for observer in self.observers:
+            observer.add(rec)
+        keys = tuple(rec)
+        if keys != self._keys:
+            self._keys, self._rows = keys, []
+            self._segments.append((keys, self._rows))
+            for key in keys:
+                if key not in self._chunks:
+                    self._chunks[key] = {}
+                    self.columns.append(key)
+        self._rows.append(tuple(rec.values()))
+        self._buf_rows += 1
+        if self._buf_rows >= self.chunk_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buf_rows:
+            return
+        idx = len(self._chunk_lens)
+        if len(self._segments) == 1:
+            keys, rows = self._segments[0]
+            for key, values in zip(keys, zip(*rows)):
+                self._chunks[key][idx] = _typed(values)
+        else:
+            present = {key for keys, _ in self._segments for key in keys}
+            for key in present:
+                values = []
+                for keys, rows in self._segments:
+                    if key in keys:
+                        k = keys.index(key)
+                        values.extend(row[k] for row in rows)
+                    else:
+                        values.extend([None] * len(rows))
+                self._chunks[key][idx] = _typed(values)
+        self._chunk_lens.append(self._buf_rows)
+        self._segments, self._keys, self._rows, self._buf_rows = [], None, None, 0
+
+    def to_dataframe(self) -> pd.DataFrame:
+        self._flush()
+        data = {}
+        for key in self.columns:
+            chunks = self._chunks[key]
+            parts = [
+                chunks[idx] if idx in chunks else pd.Series(np.nan, index=range(length))
+                for idx, length in enumerate(self._chunk_lens)
+            ]
+            data[key] = _concat_column(parts)
+        df = pd.DataFrame(data)
+        missing = REQUIRED_COLUMNS - set(df.columns)
+        if not missing:
+            df.sort_values(["node", "root_time_now"], inplace=True)
+        return df
+
+    def to_csv(self, csv_output: Path) -> pd.DataFrame:
+        df = self.to_dataframe()
+        df.to_csv(csv_output, index=False)
+        return df
+
+    def to_parquet(self, parquet_output: Path) -> pd.DataFrame:
+        df = self.to_dataframe()
+        write_parquet(df, parquet_output)
+        return df
+
+
+class SimLogDemux:
+    """
+    Separa o log de um lote de simulações executadas em sequência pela mesma
+    JVM: cada SIM_BEGIN avança para a próxima simulação, na ordem em que os
+    .csc foram passados ao Cooja. As linhas de cada uma vão para o parser
+    (e, opcionalmente, para o arquivo de log) correspondente.
+    'started' e 'ended' contam os SIM_BEGIN e SIM_END recebidos: uma
+    simulação sem SIM_END foi interrompida e seu log está incompleto.
+    Com 'names', o nome do job em cada marcador é conferido com o esperado
+    naquela posição; qualquer divergência levanta RuntimeError, em vez de
+    atribuir o log a outro job.
+    """
+
+    def __init__(self, parsers: list[CoojaLogParser], logs: list | None = None, names: list[str] | None = None):
+        self.parsers = parsers
+        self.logs = logs
+        self.names = names
+        self.started = 0
+        self.ended = 0
+        self._current = None
+
+    def _check(self, marker: str, line: str, k: int) -> None:
+        if self.names is None:
+            return
+        job = line.split(marker, 1)[1].strip()
+        expected = self.names[k] if k < len(self.names) else None
+        if job != expected:
+            raise RuntimeError(f"{marker!r} of simulation {k + 1} is for {job!r}, expected {expected!r}")
+
+    def feed(self, line: str) -> None:
+        if SIM_TAG in line:
+            if SIM_BEGIN in line:
+                k = self.started
+                self.started += 1
+                self._check(SIM_BEGIN, line, k)
+                self._current = k if k < len(self.parsers) else None
+            elif SIM_END in line:
+                if self._current is not None:
+                    self._check(SIM_END, line, self._current)
+                    self.ended += 1
+                self._current = None
+            return
+        if self._current is None:
+            return
+        self.parsers[self._current].feed(line)
+        if self.logs is not None:
+            self.logs[self._current].write(line)
+
+
+def iter_gzip_lines(chunks):
+    """Descomprime um stream gzip recebido em blocos e gera as linhas completas."""
+    dec = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    pending = b""
+    for chunk in chunks:
+        pending += dec.decompress(chunk)
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace") + "\n"
+    pending += dec.flush()
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def open_log(path: Path):
+    """Abre o log em modo texto, descomprimindo se for .gz."""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return path.open(encoding="utf-8")
+
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Menor largura inteira (com sinal) que comporta cada coluna inteira e
+    'node' como categoria (dictionary no Parquet); floats ficam em float64."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if s.dtype.kind == "i" and len(s):
+            lo, hi = s.min(), s.max()
+            for width in _INT_WIDTHS:
+                info = np.iinfo(width)
+                if info.min <= lo and hi <= info.max:
+                    s = s.astype(width)
+                    break
+        elif col == "node":
+            s = s.astype("category")
+        out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def write_parquet(df: pd.DataFrame, parquet_output: Path) -> None:
+    if pq is None:
+        raise ImportError("pyarrow is required to write Parquet results")
+    table = pa.Table.from_pandas(compact_dtypes(df), preserve_index=False)
+    pq.write_table(table, parquet_output, compression=PARQUET_COMPRESSION)
+
+
+def write_results(df: pd.DataFrame, out_dir: Path, csv: bool = False) -> Path:
+    """
+    Grava os resultados de uma simulação em 'out_dir': sim.parquet quando o
+    pyarrow está disponível e as colunas são convertíveis, sim.csv caso
+    contrário. Com csv=True o CSV também é exportado. Retorna o arquivo principal.
+    """
+    path = out_dir / RESULTS_CSV
+    if pq is not None:
+        try:
+            write_parquet(df, out_dir / RESULTS_PARQUET)
+            path = out_dir / RESULTS_PARQUET
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            # p.ex. uma coluna com tipos misturados vinda de firmwares diferentes
+            print(f"[WARN] {out_dir}: cannot write Parquet ({e}); falling back to CSV")
+            (out_dir / RESULTS_PARQUET).unlink(missing_ok=True)
+    if csv or path.suffix == ".csv":
+        df.to_csv(out_dir / RESULTS_CSV, index=False)
+    return path
+
+
+def results_path(out_dir: Path) -> Path:
+    parquet = out_dir / RESULTS_PARQUET
+    return parquet if parquet.exists() and pq is not None else out_dir / RESULTS_CSV
+
+
+def read_results(out_dir: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Lê os resultados de uma simulação (sim.parquet ou, na falta, sim.csv).
+    Com 'columns', só as colunas pedidas que existem no arquivo são lidas.
+    """
+    path = results_path(out_dir)
+    if path.suffix == ".parquet":
+        if columns is not None:
+            names = set(pq.read_schema(path).names)
+            columns = [c for c in columns if c in names]
+        return pq.read_table(path, columns=columns).to_pandas()
+    if columns is not None:
+        wanted = set(columns)
+        return pd.read_csv(path, usecols=lambda c: c in wanted)
+    return pd.read_csv(path)
+
+
+def export_csv(out_dir: Path) -> Path:
+    """Exporta sim.parquet de 'out_dir' como sim.csv."""
+    csv_path = out_dir / RESULTS_CSV
+    read_results(out_dir).to_csv(csv_path, index=False)
+    return csv_path
+
+
+def cooja_log_to_csv(cooja_log_input: Path, csv_output: Path, mote_id: int = LOG_MOTE_ID) -> pd.DataFrame:
+    parser = CoojaLogParser(mote_id)
+    with open_log(cooja_log_input) as f:
+        parser.feed_lines(f)
+    return parser.to_csv(csv_output)
@@ -0,0 +1,316 @@
+import io
+import itertools
+import json
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from .csv_converter import LOG_TAG, SIM_TAG, SIM_BEGIN, SIM_END, SIM_JOB, open_log
+from .manifest import job_key
+from .replication import REP_SEP, split_replicate
+
+STREAM_CHUNK = 64 * 1024
+
+
+def cooja_stream_cmd(java_cmd: str, csc_files: list[str]) -> str:
+    """
+    Comando de shell que roda o Cooja em segundo plano e transmite o
+    COOJA.testlog pela saída padrão até a JVM terminar; o status de saída é o
+    do próprio Cooja. Só as linhas do sink e os marcadores de simulação são
+    mantidos, comprimidos com gzip.
+    """
+    java = f"{java_cmd} {' '.join(shlex.quote(c) for c in csc_files)}"
+    return (
+        f"{java} > cooja.out 2>&1 & pid=$!; "
+        "tail -n +1 -F --pid=$pid COOJA.testlog 2>/dev/null "
+        f"| grep --line-buffered -F -e {shlex.quote(LOG_TAG)} -e {shlex.quote(SIM_TAG)} "
+        "| gzip -1; "
+        "wait $pid"
+    )
+
+
+def job_csc(csc: Path, name: str) -> bytes:
+    """
+    Conteúdo do .csc de um job com o nome dele nos marcadores de início/fim
+    (SIM_JOB), escapado como texto de string JavaScript.
+    """
+    return Path(csc).read_text(encoding="utf-8").replace(SIM_JOB, json.dumps(name)[1:-1]).encode("utf-8")
+
+
+def positions_cmd(block: str, offset: int, positions: str) -> str:
+    """
+    Comando de shell que anexa um bloco de mobilidade compartilhado ao
+    positions.dat (que já contém a parte fixa), somando 'offset' (o número de
+    motes fixos) ao índice de cada linha de posição.
+    """
+    return (
+        f"awk -v off={int(offset)} 'NF == 4 {{ $1 += off }} 1' {shlex.quote(block)} "
+        f">> {shlex.quote(positions)}"
+    )
+
+
+class Execution:
+    """
+    Execução em andamento: 'chunks' gera o log gzip; 'wait()' retorna o status
+    de saída; 'kill()' encerra toda a árvore de processos (JVM, tail, grep, gzip),
+    o que também encerra o stream.
+    """
+
+    def __init__(self, chunks, wait, kill):
+        self.chunks = chunks
+        self.wait = wait
+        self.kill = kill
+
+
+class Executor:
+    """
+    Backend de execução de um lote de simulações.
+
+    start(worker, jobs, label, gate) é um context manager que prepara um
+    diretório de trabalho com jobs[k] = (nome, {"csc": Path, "positions": Path | None,
+    "mobility": Path | None, "mobility_offset": int}) em '<k>/' (o .csc com o
+    nome do job nos marcadores, ver job_csc), roda o Cooja sobre os .csc na
+    ordem dada e produz uma Execution. Com "mobility", o
+    positions.dat é a parte fixa mais o bloco compartilhado reindexado.
+    O Cooja só é iniciado depois de adquirir 'gate' (p.ex. Worker.run_slot()),
+    liberado ao sair do bloco: a preparação de um lote se sobrepõe à simulação
+    de outro no mesmo worker. Ao sair, o diretório de trabalho é removido.
+
+    'identity' descreve o que executa as simulações (p.ex. o comando java) e
+    firmware_id(worker, sources) identifica os fontes do firmware compilados
+    pelo Cooja naquele worker; ambos entram na chave de cache dos jobs.
+    """
+
+    identity = ""
+
+    def firmware_id(self, worker, sources: list[str]) -> str:
+        raise NotImplementedError
+
+    @contextmanager
+    def start(self, worker, jobs: list[tuple[str, dict]], label: str, gate=None):
+        raise NotImplementedError
+        yield
+
+    def close(self):
+        pass
+
+
+class SSHExecutor(Executor):
+    """Roda o Cooja em um container remoto, sobre as conexões de um SSHPool."""
+
+    def __init__(self, pool, jobs_dir: str, java_cmd: str):
+        self.pool = pool
+        self.jobs_dir = jobs_dir
+        self.java_cmd = java_cmd
+        self.identity = java_cmd
+        # blocos de mobilidade ficam no worker, um por conteúdo, entre lotes
+        self.mobility_dir = f"{jobs_dir}/mobility"
+        self._blocks: set[tuple[str, str]] = set()
+        self._blocks_lock = threading.Lock()
+
+    def _ensure_block(self, worker, sftp, block: Path) -> str:
+        """Envia o bloco ao worker se ele ainda não estiver lá; retorna o caminho remoto."""
+        remote = f"{self.mobility_dir}/{block.name}"
+        with self._blocks_lock:
+            if (worker.name, block.name) in self._blocks:
+                return remote
+        try:
+            sftp.stat(remote)
+        except FileNotFoundError:
+            tmp = f"{remote}.{uuid.uuid4().hex[:8]}.tmp"
+            sftp.put(str(block), tmp)
+            sftp.posix_rename(tmp, remote)
+        with self._blocks_lock:
+            self._blocks.add((worker.name, block.name))
+        return remote
+
+    def firmware_id(self, worker, sources):
+        cmd = "sha256sum " + " ".join(shlex.quote(s) for s in sources)
+        stdin, stdout, stderr = self.pool.exec(worker, cmd)
+        out = stdout.read()
+        if stdout.channel.recv_exit_status() != 0:
+            raise RuntimeError(f"could not hash firmware sources on {worker.name}: {stderr.read().decode().strip()}")
+        return job_key(out)
+
+    @contextmanager
+    def start(self, worker, jobs, label, gate=None):
+        batch_dir = f"{self.jobs_dir}/{label}-{uuid.uuid4().hex[:8]}"
+        sim_dirs = [f"{batch_dir}/{k}" for k in range(len(jobs))]
+
+        if self.pool.run(worker, "mkdir -p " + " ".join(shlex.quote(d) for d in [*sim_dirs, self.mobility_dir])) != 0:
+            raise RuntimeError(f"could not create {batch_dir} on {worker.name}")
+        try:
+            reindex = []
+            with self.pool.sftp(worker) as sftp:
+                for (name, files), sim_dir in zip(jobs, sim_dirs):
+                    sftp.putfo(io.BytesIO(job_csc(files["csc"], name)), f"{sim_dir}/simulation.csc")
+                    if files.get("positions"):
+                        sftp.put(str(files["positions"]), f"{sim_dir}/positions.dat")
+                    if files.get("mobility"):
+                        block = self._ensure_block(worker, sftp, files["mobility"])
+                        reindex.append(positions_cmd(block, files["mobility_offset"], f"{sim_dir}/positions.dat"))
+            if reindex and self.pool.run(worker, " && ".join(reindex)) != 0:
+                with self._blocks_lock:  # p.ex. um bloco removido do worker: reenvia na próxima vez
+                    self._blocks = {b for b in self._blocks if b[0] != worker.name}
+                raise RuntimeError(f"could not write positions.dat in {batch_dir} on {worker.name}")
+
+            with gate or nullcontext():
+                # o sshd inicia o comando em uma sessão própria: $$ identifica o grupo de processos
+                csc_files = [f"{k}/simulation.csc" for k in range(len(jobs))]
+                pid_file = f"{batch_dir}/job.pid"
+                cmd = (
+                    f"cd {shlex.quote(batch_dir)} && echo $$ > job.pid && "
+                    f"{{ {cooja_stream_cmd(self.java_cmd, csc_files)}; }}"
+                )
+                stdin, stdout, stderr = self.pool.exec(worker, cmd)
+                stdin.close()
+                channel = stdout.channel
+
+                def chunks():
+                    while chunk := channel.recv(STREAM_CHUNK):
+                        yield chunk
+
+                def kill():
+                    self.pool.run(worker, f"kill -KILL -- -$(cat {shlex.quote(pid_file)}) 2>/dev/null")
+                    channel.close()
+
+                yield Execution(chunks(), channel.recv_exit_status, kill)
+        finally:
+            self.pool.run(worker, f"rm -rf {shlex.quote(batch_dir)}")
+
+    def close(self):
+        self.pool.close()
+
+
+class LocalExecutor(Executor):
+    """Roda o Cooja como subprocesso local, com o mesmo comando de shell do SSHExecutor."""
+
+    def __init__(self, jobs_dir, java_cmd: str):
+        self.jobs_dir = Path(jobs_dir)
+        self.java_cmd = java_cmd
+        self.identity = java_cmd
+
+    def firmware_id(self, worker, sources):
+        return job_key(*(Path(s) for s in sources))
+
+    @contextmanager
+    def start(self, worker, jobs, label, gate=None):
+        batch_dir = self.jobs_dir / f"{label}-{uuid.uuid4().hex[:8]}"
+        proc = None
+
+        def kill():
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        try:
+            for k, (name, files) in enumerate(jobs):
+                sim_dir = batch_dir / str(k)
+                sim_dir.mkdir(parents=True)
+                (sim_dir / "simulation.csc").write_bytes(job_csc(files["csc"], name))
+                if files.get("positions"):
+                    shutil.copy(files["positions"], sim_dir / "positions.dat")
+                if files.get("mobility"):
+                    cmd = positions_cmd(str(Path(files["mobility"]).resolve()), files["mobility_offset"], "positions.dat")
+                    subprocess.run(["bash", "-c", cmd], cwd=sim_dir, check=True)
+
+            with gate or nullcontext():
+                csc_files = [f"{k}/simulation.csc" for k in range(len(jobs))]
+                proc = subprocess.Popen(
+                    ["bash", "-c", cooja_stream_cmd(self.java_cmd, csc_files)],
+                    cwd=batch_dir,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    start_new_session=True,
+                )
+
+                def chunks():
+                    while chunk := proc.stdout.read1(STREAM_CHUNK):
+                        yield chunk
+
+                yield Execution(chunks(), proc.wait, kill)
+        finally:
+            if proc is not None:
+                kill()
+                proc.wait()
+                proc.stdout.close()
+            shutil.rmtree(batch_dir, ignore_errors=True)
+
+
+class StubExecutor(Executor):
+    """
+    Substituto do Cooja para testes e benchmarks: reproduz logs gravados
+    (COOJA.testlog ou sim.log.gz) em vez de simular.
+    - logs_dir: procura '<nome>.testlog', '<nome>/COOJA.testlog' ou
+      '<nome>/sim.log.gz' para cada job e, para uma réplica ('<design>/rep-<k>')
+      sem log próprio, os do design; na falta, usa os logs disponíveis em rodízio.
+    - startup_delay: segundos por lote (partida da JVM).
+    - sim_delay: segundos por simulação, distribuídos ao longo do replay.
+    """
+
+    def __init__(self, logs_dir, startup_delay: float = 0.0, sim_delay: float = 0.0, chunk_lines: int = 1000):
+        self.logs_dir = Path(logs_dir)
+        self.startup_delay = startup_delay
+        self.sim_delay = sim_delay
+        self.chunk_lines = max(1, chunk_lines)
+        self._fallback = sorted(
+            p for pattern in ("*.testlog", "*/COOJA.testlog", "*/sim.log.gz", "*/sim.log")
+            for p in self.logs_dir.glob(pattern)
+        )
+        self._next = itertools.count()
+        self.identity = f"stub:{self.logs_dir.resolve()}"
+
+    def firmware_id(self, worker, sources):
+        return "stub"
+
+    def _recorded_log(self, name: str) -> Path:
+        lookup = [name, split_replicate(name)[0]] if REP_SEP in name else [name]
+        for base in lookup:
+            for candidate in (
+                self.logs_dir / f"{base}.testlog",
+                self.logs_dir / base / "COOJA.testlog",
+                self.logs_dir / base / "sim.log.gz",
+                self.logs_dir / base / "sim.log",
+            ):
+                if candidate.exists():
+                    return candidate
+        if not self._fallback:
+            raise FileNotFoundError(f"no recorded logs in {self.logs_dir}")
+        return self._fallback[next(self._next) % len(self._fallback)]
+
+    def _replay(self, jobs, killed):
+        # um único membro gzip com flush por bloco, como o 'gzip -1' remoto
+        comp = zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        def emit(text: str) -> bytes:
+            return comp.compress(text.encode("utf-8")) + comp.flush(zlib.Z_SYNC_FLUSH)
+
+        if killed.wait(self.startup_delay):
+            return
+        for name, _ in jobs:
+            with open_log(self._recorded_log(name)) as f:
+                lines = [line for line in f if LOG_TAG in line]
+            n_chunks = max(1, -(-len(lines) // self.chunk_lines))
+            yield emit(f"{SIM_BEGIN} {name}\n")
+            for i in range(0, n_chunks * self.chunk_lines, self.chunk_lines):
+                if killed.wait(self.sim_delay / n_chunks):
+                    return
+                block = "".join(lines[i:i + self.chunk_lines])
+                if block:
+                    yield emit(block)
+            yield emit(f"{SIM_END} {name}\n")
+        yield comp.flush()
+
+    @contextmanager
+    def start(self, worker, jobs, label, gate=None):
+        killed = threading.Event()
+        with gate or nullcontext():
+            yield Execution(self._replay(jobs, killed), lambda: -signal.SIGKILL if killed.is_set() else 0, killed.set)
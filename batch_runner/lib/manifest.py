@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+DONE = "done"
+PENDING = "pending"
+FAILED = "failed"
+
+
+def job_key(*parts) -> str:
+    """sha256 de uma sequência de partes (bytes, str ou Path, lida como bytes); None vira vazio."""
+    h = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            data = b""
+        elif isinstance(part, Path):
+            data = part.read_bytes()
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = bytes(part)
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class Manifest:
+    """
+    Estado persistente de um lote: para cada job (nome do JSON de entrada)
+    guarda a chave de conteúdo, o status ('pending'/'done'/'failed') e os
+    objetivos (ou o erro).
+    Um job cuja chave já tem resultados não precisa ser simulado de novo;
+    um lote interrompido é retomado pelos jobs ainda pendentes ou que falharam.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.jobs: dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.jobs = json.load(f).get("jobs", {})
+
+    def is_done(self, name: str, key: str) -> bool:
+        entry = self.jobs.get(name)
+        return entry is not None and entry["key"] == key and entry["status"] == DONE
+
+    def find_done(self, key: str) -> str | None:
+        """Nome de um job concluído com a mesma chave (p.ex. um JSON duplicado)."""
+        for name, entry in self.jobs.items():
+            if entry["key"] == key and entry["status"] == DONE:
+                return name
+        return None
+
+    def mark_pending(self, name: str, key: str):
+        self.jobs[name] = {"key": key, "status": PENDING}
+
+    def mark_done(self, name: str, key: str, objectives: dict):
+        self.jobs[name] = {"key": key, "status": DONE, "objectives": objectives}
+
+    def mark_failed(self, name: str, key: str, error: str):
+        self.jobs[name] = {"key": key, "status": FAILED, "error": error}
+
+    def pending(self) -> list[str]:
+        return [name for name, entry in self.jobs.items() if entry["status"] == PENDING]
+
+    def save(self):
+        """Grava de forma atômica (arquivo temporário + rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"jobs": self.jobs}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def copy_results(src_dir: Path, dst_dir: Path):
+    """Reaproveita os artefatos de um job concluído com a mesma chave."""
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    for f in src_dir.iterdir():
+        if f.is_file():
+            shutil.copy2(f, dst_dir / f.name)
@@ -0,0 +1,224 @@
+"""
+Registro de métricas sobre os resultados de uma simulação (sim.parquet/sim.csv).
+
+Cada métrica declara as colunas de que precisa, as agregações por nó
+(coluna, 'first' | 'last' | 'min' | 'max' | 'mean' | 'nunique') e uma função vetorizada
+reduce(df, nodes) -> float, onde 'df' traz as colunas pedidas, numéricas e
+ordenadas por (node, root_time_now), e 'nodes' tem uma linha por nó com as
+agregações em colunas '<coluna>_<agregação>' (first/last ignoram nulos).
+
+evaluate() lê cada resultado uma única vez e calcula todas as métricas com um
+único groupby; backfill() grava metrics.json em toda uma árvore de resultados,
+em paralelo.
+
+    python -m lib.metrics <resultados> [--metrics pdr,hops_mean] [--jobs N] [--force]
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .csv_converter import RESULTS_CSV, RESULTS_PARQUET, read_results
+
+NODE_COL = "node"
+TIME_COL = "root_time_now"
+METRICS_FILE = "metrics.json"
+
+
+class Metric:
+    def __init__(self, name: str, columns: tuple[str, ...], reduce, per_node: tuple[tuple[str, str], ...] = ()):
+        self.name = name
+        self.columns = tuple(columns)
+        self.per_node = tuple(per_node)
+        self.reduce = reduce
+
+    def __repr__(self) -> str:
+        return f"Metric({self.name})"
+
+
+METRICS: dict[str, Metric] = {}
+
+
+def register(name: str, columns, per_node=()):
+    """Decorador: registra reduce(df, nodes) como a métrica 'name'."""
+    def wrap(reduce):
+        METRICS[name] = Metric(name, columns, reduce, per_node)
+        return reduce
+    return wrap
+
+
+def _select(names=None) -> list[Metric]:
+    if names is None:
+        return list(METRICS.values())
+    unknown = [n for n in names if n not in METRICS]
+    if unknown:
+        raise KeyError(f"unknown metrics: {', '.join(unknown)}")
+    return [METRICS[n] for n in names]
+
+
+def required_columns(names=None) -> list[str]:
+    cols = {NODE_COL, TIME_COL}
+    for m in _select(names):
+        cols.update(m.columns)
+    return sorted(cols)
+
+
+def _node_delta(nodes: pd.DataFrame, col: str) -> pd.Series:
+    """Último menos primeiro valor de 'col' em cada nó, limitado a zero."""
+    return (nodes[f"{col}_last"] - nodes[f"{col}_first"]).clip(lower=0)
+
+
+def evaluate(df: pd.DataFrame, names=None) -> dict[str, float]:
+    """Calcula as métricas 'names' (todas, por padrão) sobre um DataFrame de resultados."""
+    metrics = _select(names)
+    present = set(df.columns)
+    # sem alguma coluna (ou sem 'node', para agregações por nó) a métrica é NaN
+    usable = [m for m in metrics if set(m.columns) | ({NODE_COL} if m.per_node else set()) <= present]
+
+    cols = sorted({c for m in usable for c in m.columns} | ({NODE_COL, TIME_COL} & present))
+    data = {
+        c: df[c] if c == NODE_COL else pd.to_numeric(df[c], errors="coerce").astype("float64")
+        for c in cols
+    }
+    df = pd.DataFrame(data)
+    if {NODE_COL, TIME_COL} <= present:
+        df = df.sort_values([NODE_COL, TIME_COL], kind="stable", ignore_index=True)
+
+    nodes = None
+    aggs = {f"{c}_{fn}": (c, fn) for m in usable for c, fn in m.per_node}
+    if aggs:
+        nodes = df.groupby(NODE_COL, sort=False, observed=True).agg(**aggs)
+
+    out = {m.name: float("nan") for m in metrics}
+    for m in usable:
+        out[m.name] = float(m.reduce(df, nodes))
+    return out
+
+
+def evaluate_dir(out_dir: Path, names=None) -> dict[str, float]:
+    """Lê só as colunas necessárias dos resultados em 'out_dir' e calcula as métricas."""
+    return evaluate(read_results(out_dir, columns=required_columns(names)), names)
+
+
+# ============================================================
+# Métricas
+# ============================================================
+
+@register("latency", ("rtt_latency",))
+def _latency(df, nodes):
+    s = df["rtt_latency"].dropna()
+    return s.mean() if len(s) else np.nan
+
+
+@register("energy", ("total_energy_mj",))
+def _energy(df, nodes):
+    return df["total_energy_mj"].sum(skipna=True)
+
+
+@register("throughput", ("server_received",), per_node=(("server_received", "first"), ("server_received", "last")))
+def _throughput(df, nodes):
+    return _node_delta(nodes, "server_received").sum(skipna=True)
+
+
+@register("pdr", ("total_sent",), per_node=(("total_sent", "max"), ("total_sent", "nunique")))
+def _pdr(df, nodes):
+    # cada registro do sink é um pacote entregue e total_sent é o número de
+    # sequência do nó (a partir de 1): entregues são as sequências distintas
+    # (descarta duplicatas) e enviados, a maior sequência vista. server_received
+    # não serve: é um contador do servidor, não do nó de origem.
+    sent = nodes["total_sent_max"].sum(skipna=True)
+    delivered = nodes["total_sent_nunique"].sum(skipna=True)
+    return delivered / sent if sent > 0 else np.nan
+
+
+def _latency_quantile(q: float):
+    def reduce(df, nodes):
+        s = df["rtt_latency"].dropna()
+        return s.quantile(q) if len(s) else np.nan
+    return reduce
+
+
+for _q in (50, 90, 95, 99):
+    register(f"latency_p{_q}", ("rtt_latency",))(_latency_quantile(_q / 100))
+
+
+@register("energy_node_max", ("total_energy_mj",), per_node=(("total_energy_mj", "max"),))
+def _energy_node_max(df, nodes):
+    # o nó que mais gasta limita o tempo de vida da rede
+    return nodes["total_energy_mj_max"].max()
+
+
+@register("hops_mean", ("hops",))
+def _hops_mean(df, nodes):
+    s = df["hops"].dropna()
+    return s.mean() if len(s) else np.nan
+
+
+@register("hops_max", ("hops",))
+def _hops_max(df, nodes):
+    return df["hops"].max()
+
+
+# ============================================================
+# Backfill
+# ============================================================
+
+def write_metrics(run_dir: Path, metrics: dict[str, float]) -> None:
+    """Mescla 'metrics' no metrics.json de 'run_dir'."""
+    path = run_dir / METRICS_FILE
+    current = {}
+    if path.exists():
+        with open(path, "r") as f:
+            current = json.load(f)
+    current.update(metrics)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(current, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _backfill_one(run_dir: Path, names, force: bool) -> tuple[Path, list[str]]:
+    wanted = [m.name for m in _select(names)]
+    path = run_dir / METRICS_FILE
+    if not force and path.exists():
+        with open(path, "r") as f:
+            done = json.load(f)
+        wanted = [n for n in wanted if n not in done]
+    if wanted:
+        write_metrics(run_dir, evaluate_dir(run_dir, wanted))
+    return run_dir, wanted
+
+
+def backfill(root: Path, names=None, jobs: int | None = None, force: bool = False):
+    """
+    Calcula as métricas de todos os diretórios de resultados abaixo de 'root'
+    em paralelo (processos), só as que ainda faltam no metrics.json de cada um
+    (todas, com force=True). Gera (diretório, métricas calculadas).
+    """
+    _select(names)
+    run_dirs = sorted({p.parent for pattern in (RESULTS_PARQUET, RESULTS_CSV) for p in Path(root).rglob(pattern)})
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_backfill_one, d, names, force) for d in run_dirs]
+        for fut in futures:
+            yield fut.result()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Backfills metrics.json over a results tree.")
+    ap.add_argument("root", type=Path)
+    ap.add_argument("--metrics", help=f"comma-separated subset of: {', '.join(METRICS)}")
+    ap.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    ap.add_argument("--force", action="store_true", help="recompute metrics already in metrics.json")
+    args = ap.parse_args()
+
+    names = args.metrics.split(",") if args.metrics else None
+    for run_dir, computed in backfill(args.root, names, args.jobs, args.force):
+        print(f"{run_dir}: {', '.join(computed) if computed else 'up to date'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Colunas usadas pelos objetivos
+NODE_COL = "node"
+TIME_COL = "root_time_now"
+LATENCY_COL = "rtt_latency"
+ENERGY_COL = "total_energy_mj"
+THROUGHPUT_COL = "server_received"
+
+_INF = float("inf")
+
+
+def _number(v):
+    """Valor numérico de um campo do registro, ou None (como pd.to_numeric(errors="coerce"))."""
+    t = type(v)
+    if t is int:
+        return v
+    if t is float:
+        return None if v != v else v
+    if t is str:
+        try:
+            f = float(v)
+        except ValueError:
+            return None
+        return None if f != f else f
+    return None
+
+
+class ObjectiveAccumulator:
+    """
+    Calcula os objetivos (latency, energy, throughput) registro a registro,
+    enquanto o log é lido, com memória proporcional ao número de nós:
+    - latency: média de rtt_latency;
+    - energy: soma de total_energy_mj;
+    - throughput: soma, por nó, de server_received no último registro menos o
+      do primeiro (ordem de root_time_now, empates na ordem de chegada),
+      limitada a zero.
+    Valores nulos ou não numéricos são ignorados, e um objetivo cuja coluna
+    nunca aparece é NaN, como nas métricas de mesmo nome em lib/metrics.py.
+    """
+
+    def __init__(self):
+        self._has_latency = self._has_energy = self._has_throughput = False
+        self._latency_sum = 0
+        self._latency_n = 0
+        self._energy_sum = 0
+        self._first: dict[str, tuple] = {}   # nó -> (instante, valor)
+        self._last: dict[str, tuple] = {}
+
+    def add(self, rec: dict) -> None:
+        if LATENCY_COL in rec:
+            self._has_latency = True
+            v = _number(rec[LATENCY_COL])
+            if v is not None:
+                self._latency_sum += v
+                self._latency_n += 1
+
+        if ENERGY_COL in rec:
+            self._has_energy = True
+            v = _number(rec[ENERGY_COL])
+            if v is not None:
+                self._energy_sum += v
+
+        if THROUGHPUT_COL in rec:
+            self._has_throughput = True
+            v = _number(rec[THROUGHPUT_COL])
+            node = rec.get(NODE_COL)
+            if v is None or node is None:
+                return
+            t = _number(rec.get(TIME_COL))
+            if t is None:
+                t = _INF  # sem instante: ordenado por último, como no sort_values
+            first = self._first.get(node)
+            if first is None or t < first[0]:
+                self._first[node] = (t, v)
+            last = self._last.get(node)
+            if last is None or t >= last[0]:
+                self._last[node] = (t, v)
+
+    def result(self) -> dict[str, float]:
+        nan = float("nan")
+        if self._has_throughput:
+            throughput = float(sum(
+                max(self._last[node][1] - first, 0) for node, (_, first) in self._first.items()
+            ))
+        else:
+            throughput = nan
+        return {
+            "latency": self._latency_sum / self._latency_n if self._latency_n else nan,
+            "energy": float(self._energy_sum) if self._has_energy else nan,
+            "throughput": throughput,
+        }
+
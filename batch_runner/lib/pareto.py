@@ -0,0 +1,77 @@
+import json
+import math
+import os
+from pathlib import Path
+
+# Objetivos e sentido de otimização: latency ↓, energy ↓, throughput ↑
+OBJECTIVES = ("latency", "energy", "throughput")
+MINIMIZE = (True, True, False)
+
+
+def dominates(a: dict[str, float], b: dict[str, float]) -> bool:
+    """'a' é ao menos tão bom quanto 'b' em todos os objetivos e melhor em algum."""
+    strictly_better = False
+    for name, minimize in zip(OBJECTIVES, MINIMIZE):
+        x, y = (a[name], b[name]) if minimize else (b[name], a[name])
+        if x > y:
+            return False
+        if x < y:
+            strictly_better = True
+    return strictly_better
+
+
+class ParetoFront:
+    """
+    Conjunto não dominado mantido de forma incremental: cada solução nova é
+    comparada apenas com o front atual (O(tamanho do front) por inserção).
+    Soluções com algum objetivo ausente ou NaN não entram no front.
+    Todas as soluções válidas ficam em 'known': quando uma solução re-simulada
+    substitui a anterior, o front é refeito a partir delas, já que as soluções
+    que a versão antiga dominava (e tirou do front) podem voltar a ele.
+    Persistido em JSON ({"front": {id: objetivos}}) com gravação atômica.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path is not None else None
+        self.front: dict[str, dict[str, float]] = {}
+        self.known: dict[str, dict[str, float]] = {}
+
+    def add(self, sid: str, objectives: dict[str, float]) -> bool:
+        """Insere 'sid'; retorna True se ele passou a fazer parte do front."""
+        replaced = self.known.pop(sid, None) is not None
+        if any(not isinstance(objectives.get(k), (int, float)) or math.isnan(objectives[k]) for k in OBJECTIVES):
+            if sid in self.front:
+                self._rebuild()
+            return False
+        self.known[sid] = {k: objectives[k] for k in OBJECTIVES}
+        if replaced:
+            self._rebuild()
+            return sid in self.front
+        return self._insert(sid, self.known[sid])
+
+    def _insert(self, sid: str, objectives: dict[str, float]) -> bool:
+        if any(dominates(other, objectives) for other in self.front.values()):
+            return False
+        self.front = {k: v for k, v in self.front.items() if not dominates(objectives, v)}
+        self.front[sid] = objectives
+        return True
+
+    def _rebuild(self):
+        # a ordem não importa: quem descarta um ponto também é descartado só
+        # por outro que, por transitividade, domina o mesmo ponto
+        self.front = {}
+        for sid, objectives in self.known.items():
+            self._insert(sid, objectives)
+
+    def __len__(self) -> int:
+        return len(self.front)
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self.front
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"objectives": list(OBJECTIVES), "front": self.front}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
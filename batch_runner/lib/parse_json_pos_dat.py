@@ -1,9 +1,140 @@
+import hashlib
+import io
+import json
 import logging
+import os
+from pathlib import Path
+
 import numpy as np
 
+# Passos de tempo formatados e gravados por vez
+WRITE_CHUNK_STEPS = 4096
+
+# Parte fixa do positions.dat gravada quando a mobilidade vem do MobilityCache:
+# um fragmento, com nome próprio para não ser confundido com o arquivo completo
+FIXED_POSITIONS = "positions.fixed.dat"
+
+_ROW = "%d %.8f %.2f %.2f\n%s"
+
 def evaluate_function(expression: str, t_values: np.ndarray) -> np.ndarray:
+    """Avalia a expressão sobre todo o vetor t de uma vez; expressões que não
+    aceitam vetores (p.ex. com if/else ou max()) são avaliadas ponto a ponto."""
+    try:
+        values = np.asarray(eval(expression, {"t": t_values, "np": np}), dtype=float)
+        if values.ndim == 0:
+            values = np.full(t_values.shape, float(values))
+        if values.shape == t_values.shape:
+            return values
+    except (TypeError, ValueError):
+        pass
     return np.array([eval(expression, {"t": t, "np": np}) for t in t_values])
 
+def write_mobile_positions(file, trajectories, max_steps: int | None = None,
+                           chunk_steps: int = WRITE_CHUNK_STEPS) -> None:
+    """
+    Grava as trajetórias (mote_id, x, y, time_step) ordenadas por passo e, em
+    cada passo, na ordem dos motes, com uma linha em branco ao fim de cada passo.
+    A tabela (mote, instante, x, y) é montada em arrays e formatada em blocos
+    de 'chunk_steps' passos. Os passos param no fim da trajetória mais longa
+    (ou em 'max_steps').
+    """
+    if not trajectories:
+        return
+    n_steps = max(len(x) for _, x, _, _ in trajectories)
+    if max_steps is not None:
+        n_steps = min(n_steps, max_steps)
+    for first in range(0, n_steps, chunk_steps):
+        last = min(first + chunk_steps, n_steps)
+        steps = np.arange(first, last)
+        ids, times, xs, ys, order = [], [], [], [], []
+        for k, (mote_id, x_full, y_full, time_step) in enumerate(trajectories):
+            active = steps[steps < len(x_full)]
+            if not len(active):
+                continue
+            ids.append(np.full(len(active), mote_id))
+            times.append(active * time_step)
+            xs.append(x_full[active])
+            ys.append(y_full[active])
+            order.append(active * len(trajectories) + k)
+        # passo a passo, na ordem dos motes
+        key = np.concatenate(order)
+        idx = np.argsort(key, kind="stable")
+        step_of = key[idx] // len(trajectories)
+        table = np.empty((len(idx), 5), dtype=object)
+        table[:, 0] = np.concatenate(ids)[idx]
+        table[:, 1] = np.concatenate(times)[idx]
+        table[:, 2] = np.concatenate(xs)[idx]
+        table[:, 3] = np.concatenate(ys)[idx]
+        table[:, 4] = np.where(np.r_[step_of[1:] != step_of[:-1], True], "\n", "")
+        file.write((_ROW * len(idx)) % tuple(table.ravel().tolist()))
+
+def build_mobile_trajectories(
+    mobile_motes: list[dict],
+    first_index: int = 0,
+    debug = False
+    ) -> tuple[list[tuple], list[tuple[float, float]], int]:
+    """Trajetórias (mote_id, x, y, time_step) dos motes móveis, numerados a
+    partir de 'first_index', suas posições iniciais e o maior número de passos."""
+    mobile_start_positions = []
+    mote_index = first_index
+    max_steps = 0
+    mobile_trajectories = []
+
+    for mote in mobile_motes:
+        path_segments = mote["functionPath"]
+        speed = mote["speed"]
+        time_step = mote["timeStep"]
+        is_round_trip = mote.get("isRoundTrip", False)
+
+        if debug:
+            log = logging.getLogger(__name__)
+            log.debug("path_segments", path_segments)
+
+        # Avaliação dos segmentos
+        x_all, y_all, segment_distances = [], [], []
+        for x_expr, y_expr in path_segments:
+            t_values = np.linspace(0, 1, num=100)
+            x_vals = evaluate_function(x_expr, t_values)
+            y_vals = evaluate_function(y_expr, t_values)
+            x_all.append(x_vals)
+            y_all.append(y_vals)
+            segment_distances.append(np.sum(np.sqrt(np.diff(x_vals)**2 + np.diff(y_vals)**2)))
+
+        total_distance = np.sum(segment_distances)
+        total_duration = total_distance / speed
+        total_steps = max(1, int(total_duration / time_step))
+        max_steps = max(max_steps, total_steps)
+
+        # Interpolação proporcional por segmento
+        x_parts, y_parts = [], []
+        for x_vals, y_vals, seg_dist in zip(x_all, y_all, segment_distances):
+            proportion = seg_dist / total_distance if total_distance > 0 else 1
+            seg_steps = max(1, int(proportion * total_steps))
+            interp_t = np.linspace(0, 1, seg_steps)
+            x_parts.append(np.interp(interp_t, np.linspace(0, 1, len(x_vals)), x_vals))
+            y_parts.append(np.interp(interp_t, np.linspace(0, 1, len(y_vals)), y_vals))
+
+        x_full = np.concatenate(x_parts)
+        y_full = np.concatenate(y_parts)
+
+        if is_round_trip:
+            x_full = np.concatenate((x_full, x_full[::-1]))
+            y_full = np.concatenate((y_full, y_full[::-1]))
+
+        mobile_start_positions.append((x_full[0], y_full[0]))
+        mobile_trajectories.append((mote_index, x_full, y_full, time_step))
+        mote_index += 1
+
+    return mobile_trajectories, mobile_start_positions, max_steps
+
+def write_fixed_positions(file, fixed_positions: list[tuple[float, float]]) -> None:
+    """Parte fixa do positions.dat, até o cabeçalho da seção de motes móveis."""
+    file.write("# Fixed positions\n")
+    for i, (x, y) in enumerate(fixed_positions):
+        file.write(f"{i} 0.00000000 {x:.2f} {y:.2f}\n")
+    file.write("\n")
+    file.write("# Mobile nodes\n")
+
 def generate_positions_from_json(
     simElements: dict, 
     output_filename: str = "positions.dat",
@@ -11,72 +142,82 @@ def generate_positions_from_json(
     ) -> tuple[list[tuple[float, float]], list[tuple[float, float]]]:
 
     fixed_positions = [(mote["position"][0], mote["position"][1]) for mote in simElements["fixedMotes"]]
-    mobile_motes = simElements["mobileMotes"]
-    
-    mobile_start_positions = []
+    mobile_trajectories, mobile_start_positions, max_steps = build_mobile_trajectories(
+        simElements["mobileMotes"], first_index=len(fixed_positions), debug=debug
+    )
 
     with open(output_filename, "w") as file:
-        file.write("# Fixed positions\n")
-        for i, (x, y) in enumerate(fixed_positions):
-            file.write(f"{i} 0.00000000 {x:.2f} {y:.2f}\n")
-        file.write("\n")
-
-        file.write("# Mobile nodes\n")
-        mote_index = len(fixed_positions)
-        max_steps = 0
-        mobile_trajectories = []
-
-        for mote in mobile_motes:
-            path_segments = mote["functionPath"]
-            speed = mote["speed"]
-            time_step = mote["timeStep"]
-            is_round_trip = mote.get("isRoundTrip", False)
-            
-            if debug:
-                log = logging.getLogger(__name__)
-                log.debug("path_segments", path_segments)
-
-            # Avaliação dos segmentos
-            x_all, y_all, segment_distances = [], [], []
-            for x_expr, y_expr in path_segments:
-                t_values = np.linspace(0, 1, num=100)
-                x_vals = evaluate_function(x_expr, t_values)
-                y_vals = evaluate_function(y_expr, t_values)
-                x_all.append(x_vals)
-                y_all.append(y_vals)
-                segment_distances.append(np.sum(np.sqrt(np.diff(x_vals)**2 + np.diff(y_vals)**2)))
-
-            total_distance = np.sum(segment_distances)
-            total_duration = total_distance / speed
-            total_steps = max(1, int(total_duration / time_step))
-            max_steps = max(max_steps, total_steps)
-
-            # Interpolação proporcional por segmento
-            x_full, y_full = [], []
-            for x_vals, y_vals, seg_dist in zip(x_all, y_all, segment_distances):
-                proportion = seg_dist / total_distance if total_distance > 0 else 1
-                seg_steps = max(1, int(proportion * total_steps))
-                interp_t = np.linspace(0, 1, seg_steps)
-                x_interp = np.interp(interp_t, np.linspace(0, 1, len(x_vals)), x_vals)
-                y_interp = np.interp(interp_t, np.linspace(0, 1, len(y_vals)), y_vals)
-                x_full.extend(x_interp)
-                y_full.extend(y_interp)
-
-            x_full = np.array(x_full)
-            y_full = np.array(y_full)
-
-            if is_round_trip:
-                x_full = np.concatenate((x_full, x_full[::-1]))
-                y_full = np.concatenate((y_full, y_full[::-1]))
-
-            mobile_start_positions.append((x_full[0], y_full[0]))
-            mobile_trajectories.append((mote_index, x_full, y_full, time_step))
-            mote_index += 1
-
-        for step in range(2 * max_steps):
-            for mote_id, x_full, y_full, time_step in mobile_trajectories:
-                if step < len(x_full):
-                    file.write(f"{mote_id} {step * time_step:.8f} {x_full[step]:.2f} {y_full[step]:.2f}\n")
-            file.write("\n")
+        write_fixed_positions(file, fixed_positions)
+        # até o fim da trajetória mais longa, sem os passos vazios que sobravam até 2 * max_steps
+        write_mobile_positions(file, mobile_trajectories, max_steps=2 * max_steps)
 
     return fixed_positions, mobile_start_positions
+
+class MobilityCache:
+    """
+    Blocos de mobilidade (a seção de motes móveis do positions.dat) gerados uma
+    única vez por conjunto distinto de mobileMotes. O bloco numera os motes
+    móveis a partir de 0; cada simulação o reindexa somando o número de motes
+    fixos (ver executors.positions_cmd). O arquivo é nomeado pelo sha256 do
+    próprio conteúdo, de modo que cópias remotas podem ser reaproveitadas.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self._blocks: dict[str, tuple[Path, list[tuple[float, float]]]] = {}
+
+    def get(self, mobile_motes: list[dict]) -> tuple[Path, list[tuple[float, float]]]:
+        """Arquivo do bloco e posições iniciais dos motes móveis."""
+        key = hashlib.sha256(json.dumps(mobile_motes, sort_keys=True).encode("utf-8")).hexdigest()
+        if key not in self._blocks:
+            trajectories, start_positions, max_steps = build_mobile_trajectories(mobile_motes)
+            buf = io.StringIO()
+            write_mobile_positions(buf, trajectories, max_steps=2 * max_steps)
+            data = buf.getvalue().encode("utf-8")
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{hashlib.sha256(data).hexdigest()}.dat"
+            if not path.exists():
+                tmp = path.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+            self._blocks[key] = (path, start_positions)
+        return self._blocks[key]
+
+def generate_fixed_positions_from_json(
+    simElements: dict,
+    mobility: MobilityCache,
+    output_filename: str = FIXED_POSITIONS,
+    ) -> tuple[list[tuple[float, float]], list[tuple[float, float]], Path | None]:
+    """
+    Como generate_positions_from_json, mas grava só a parte fixa em
+    'output_filename' (FIXED_POSITIONS: não é um positions.dat completo); a
+    parte móvel vem do bloco compartilhado de 'mobility' (None se não há motes
+    móveis), a ser anexada com os índices deslocados pelo número de motes
+    fixos. O positions.dat completo só existe no diretório de execução do job.
+    """
+    fixed_positions = [(mote["position"][0], mote["position"][1]) for mote in simElements["fixedMotes"]]
+    with open(output_filename, "w") as file:
+        write_fixed_positions(file, fixed_positions)
+
+    if not simElements["mobileMotes"]:
+        return fixed_positions, [], None
+    block, mobile_start_positions = mobility.get(simElements["mobileMotes"])
+    return fixed_positions, mobile_start_positions, block
+
+def assemble_positions(fixed: Path, block: Path | None, offset: int) -> bytes:
+    """
+    positions.dat completo de um job: a parte fixa (FIXED_POSITIONS) seguida do
+    bloco de mobilidade com os índices somados a 'offset', como faz
+    executors.positions_cmd no diretório de execução.
+    """
+    parts = [Path(fixed).read_text(encoding="utf-8")]
+    if block is not None:
+        with open(block, encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) == 4:
+                    fields[0] = str(int(fields[0]) + offset)
+                    line = " ".join(fields) + "\n"
+                parts.append(line)
+    return "".join(parts).encode("utf-8")
@@ -1,106 +1,276 @@
+import copy
 import logging
+import os
+import re
 import xml.etree.ElementTree as ET
 import xml.dom.minidom as minidom
 
+from .csv_converter import SIM_BEGIN, SIM_END, SIM_JOB
+
 logger = logging.getLogger(__name__)
 
-def update_simulation_xml(
-    fixed_positions: list[tuple[float, float]],
-    mobile_positions: list[tuple[float, float]],
+# Marcadores usados para compilar o template: valores de teste que atravessam
+# a serialização sem escapes e depois viram campos de substituição.
+_SLOT = "@@{}@@"
+_MOTE_SLOT = "@@MOTES:{}@@"
+_MARKER = re.compile(r"@@([A-Za-z_:]+)@@")
+_FIELDS = ("tx_range", "interference_range", "timeout", "timeout_close", "random_seed")
+
+
+def _apply(
+    root: ET.Element,
+    tx_range: str,
+    interference_range: str,
+    timeout: str,
+    timeout_close: str,
+    motes: list[tuple[int, str, str]],
     root_motes: list[int],
-    simulation_time: float,
-    tx_range: float,
-    interference_range: float,
-    input_file: str,
-    output_file: str
+    has_mobile: bool,
+    positions_file: str | None,
+    random_seed: str | None = None,
 ) -> None:
-    """Atualiza arquivo XML de simulação com novos parâmetros.
-    
-    Args:
-        fixed_positions: Lista de tuplas (x, y) com posições fixas
-        mobile_positions: Lista de tuplas (x, y) com posições iniciais dos móveis
-        root_motes: Lista de IDs dos motes servidores
-        simulation_time: Tempo de simulação em minutos
-        tx_range: Alcance de transmissão
-        interference_range: Alcance de interferência
-        inputFile: Caminho do arquivo XML de entrada (template)
-        outputFile: Caminho do arquivo XML de saída
-    """
-    tree = ET.parse(input_file)
-    root = tree.getroot()
-    
+    """Aplica os parâmetros (já formatados como texto) à árvore do template."""
+    # Semente do gerador aleatório do Cooja (None mantém a do template)
+    randomseed = root.find(".//randomseed")
+    if randomseed is not None and random_seed is not None:
+        randomseed.text = random_seed
+
     # Updates radio parameters
     radiomedium = root.find(".//radiomedium")
     if radiomedium is not None:
         transmitting_range = radiomedium.find("transmitting_range")
         if transmitting_range is not None:
-            transmitting_range.text = str(tx_range)
+            transmitting_range.text = tx_range
         interference_range_elem = radiomedium.find("interference_range")
         if interference_range_elem is not None:
-            interference_range_elem.text = str(interference_range)
-    
+            interference_range_elem.text = interference_range
+
     # Update simulation time in JS script keeping CDATA
     script_element = root.find(".//script")
     if script_element is not None and script_element.text is not None:
         script_text = script_element.text
-        new_timeout = simulation_time * 60000  # Convertendo minutos para milissegundos
-        script_text = script_text.replace("const timeOut = X * 1000;", f"const timeOut = {new_timeout} * 1000;")
-        script_text = script_text.replace("TIMEOUT(X);", f"TIMEOUT({new_timeout + 11000});") # 11 segundos de tolerância para fechar, pois o tempo de ping é 10 segundos.
+        script_text = script_text.replace("const timeOut = X * 1000;", f"const timeOut = {timeout} * 1000;")
+        script_text = script_text.replace("TIMEOUT(X);", f"TIMEOUT({timeout_close});")
+        # Marcadores de início/fim: separam o log de várias simulações na mesma JVM
+        # (SIM_JOB vira o nome do job quando o executor copia o .csc)
+        script_text = f'        log.log("{SIM_BEGIN} {SIM_JOB}\\n");{script_text}'
+        script_text = script_text.replace(
+            "sim.stopSimulation();", f'sim.stopSimulation();\n        log.log("{SIM_END} {SIM_JOB}\\n");', 1
+        )
         script_element.text = f"<![CDATA[\n{script_text}\n]]>"
-    
+
     # update motes
     motetype_root = root.find(".//motetype[description='server']")
     motetype_client = root.find(".//motetype[description='client']")
-    
+
     if motetype_root is not None:
         for mote in motetype_root.findall("mote"):
             motetype_root.remove(mote)
     if motetype_client is not None:
         for mote in motetype_client.findall("mote"):
             motetype_client.remove(mote)
-    
-    for i, (x, y) in enumerate(fixed_positions + mobile_positions):
-        mote_type = motetype_root if i + 1 in root_motes else motetype_client
+
+    for mote_id, x, y in motes:
+        mote_type = motetype_root if mote_id in root_motes else motetype_client
         if mote_type is not None:
             mote = ET.SubElement(mote_type, "mote")
-            
+
             interface_config = ET.SubElement(mote, "interface_config")
             interface_config.text = "org.contikios.cooja.interfaces.Position"
-            ET.SubElement(interface_config, "pos", x=str(x), y=str(y))
-            
+            ET.SubElement(interface_config, "pos", x=x, y=y)
+
             id_config = ET.SubElement(mote, "interface_config")
             id_config.text = "org.contikios.cooja.contikimote.interfaces.ContikiMoteID"
-            ET.SubElement(id_config, "id").text = str(i + 1)
-            
-    if mobile_positions is None or len(mobile_positions) == 0:
+            ET.SubElement(id_config, "id").text = str(mote_id)
+
+    if not has_mobile:
         # Remove o plugin de mobilidade, se existir
         for plugin in root.findall(".//plugin"):
             if plugin.text and "org.contikios.cooja.plugins.Mobility" in plugin.text:
                 root.remove(plugin)
-    
+    elif positions_file is not None:
+        for plugin in root.findall(".//plugin"):
+            if plugin.text and "org.contikios.cooja.plugins.Mobility" in plugin.text:
+                positions = plugin.find("plugin_config/positions")
+                if positions is not None:
+                    positions.text = positions_file
+
+
+def _serialize(root: ET.Element) -> str:
+    """Serialização do .csc: pretty-print do minidom, CDATA preservado, sem linhas em branco."""
     xml_str = ET.tostring(root, encoding='utf-8')
     parsed_xml = minidom.parseString(xml_str)
-    with open(output_file, "w", encoding="utf-8") as f:
-        output = parsed_xml.toprettyxml(indent="  ")
-        output = output.replace("?>", "encoding=\"UTF-8\"?>")
-        output = output.replace("&gt;", ">")
-        output = output.replace("&lt;", "<")
-        output = output.replace("&quot;", "\"")
-        output = output.replace("<![CDATA[\n", "<![CDATA[")
-        output = output.replace("\n]]>", "]]>")
-        
-        # Remove blank lines, exceto dentro de CDATA
-        inside_cdata = False
-        lines_without_blanks = []
-        for line in output.splitlines():
-            if "<![CDATA[" in line:
-                inside_cdata = True
-            if inside_cdata or line.strip():
-                lines_without_blanks.append(line)
-            if "]]>" in line:
-                inside_cdata = False
-                
-        final_content = "\n".join(lines_without_blanks)
-        f.write(final_content)
+    output = parsed_xml.toprettyxml(indent="  ")
+    output = output.replace("?>", "encoding=\"UTF-8\"?>")
+    output = output.replace("&gt;", ">")
+    output = output.replace("&lt;", "<")
+    output = output.replace("&quot;", "\"")
+    output = output.replace("<![CDATA[\n", "<![CDATA[")
+    output = output.replace("\n]]>", "]]>")
+
+    # Remove blank lines, exceto dentro de CDATA
+    inside_cdata = False
+    lines_without_blanks = []
+    for line in output.splitlines():
+        if "<![CDATA[" in line:
+            inside_cdata = True
+        if inside_cdata or line.strip():
+            lines_without_blanks.append(line)
+        if "]]>" in line:
+            inside_cdata = False
+
+    return "\n".join(lines_without_blanks)
+
+
+def _params(fixed_positions, mobile_positions, simulation_time, tx_range, interference_range, random_seed=None):
+    new_timeout = simulation_time * 60000  # Convertendo minutos para milissegundos
+    return {
+        "tx_range": str(tx_range),
+        "interference_range": str(interference_range),
+        "timeout": str(new_timeout),
+        # 11 segundos de tolerância para fechar, pois o tempo de ping é 10 segundos.
+        "timeout_close": str(new_timeout + 11000),
+        "random_seed": None if random_seed is None else str(random_seed),
+        "motes": [(i + 1, str(x), str(y)) for i, (x, y) in enumerate(list(fixed_positions) + list(mobile_positions or []))],
+    }
+
+
+class SimulationTemplate:
+    """
+    Template de simulação lido uma única vez e compilado em um esqueleto de
+    texto com campos para alcances de rádio, timeout, semente e blocos de motes.
+
+    O esqueleto é obtido serializando o próprio template com marcadores no
+    lugar dos valores (um por variante: com ou sem o plugin Mobility), de modo
+    que render() produz o mesmo texto do caminho ElementTree + minidom, com
+    uma substituição por campo. A primeira renderização de cada variante é
+    comparada byte a byte com o caminho completo; em caso de divergência o
+    template passa a usar sempre o caminho completo.
+    """
+
+    def __init__(self, input_file, root_motes: list[int], positions_file: str | None = None):
+        self.input_file = input_file
+        self.root_motes = list(root_motes)
+        self.positions_file = positions_file
+        self._root = ET.parse(input_file).getroot()
+        self._random_seed = self._root.findtext(".//randomseed")
+        self._skeletons: dict[bool, tuple | None] = {}
+        self._verified: set[bool] = set()
+
+    def _render_full(self, has_mobile: bool, params: dict) -> str:
+        root = copy.deepcopy(self._root)
+        _apply(root, root_motes=self.root_motes, has_mobile=has_mobile, positions_file=self.positions_file, **params)
+        return _serialize(root)
+
+    def _compile(self, has_mobile: bool):
+        """Esqueleto: texto alternando partes fixas e nomes de campo, mais o formato do bloco de mote de cada tipo."""
+        server_id = self.root_motes[0] if self.root_motes else None
+        client_id = max(self.root_motes, default=0) + 1
+        sample = {"server": server_id, "client": client_id}
+        motes = [(mid, _SLOT.format("X"), _SLOT.format("Y")) for mid in sample.values() if mid is not None]
+        text = self._render_full(has_mobile, {**{k: _SLOT.format(k) for k in _FIELDS}, "motes": motes})
+
+        # cada bloco <mote> vira um campo; o bloco, com a quebra de linha anterior, vira um formato
+        blocks = {}
+        for kind, mote_id in sample.items():
+            m = re.search(rf"\n( *)<mote>\n(?:(?!</mote>).*\n)*?.*<id>{mote_id}</id>\n(?:.*\n)*?\1</mote>", text)
+            if m is None:
+                continue
+            block = m.group(0).replace("{", "{{").replace("}", "}}")
+            block = block.replace(_SLOT.format("X"), "{x}").replace(_SLOT.format("Y"), "{y}")
+            blocks[kind] = block.replace(f"<id>{mote_id}</id>", "<id>{id}</id>")
+            text = text.replace(m.group(0), _MOTE_SLOT.format(kind))
+
+        pieces = _MARKER.split(text)
+        known = set(_FIELDS) | {f"MOTES:{kind}" for kind in blocks}
+        if not set(pieces[1::2]) <= known:
+            raise ValueError(f"unexpected markers {set(pieces[1::2]) - known}")
+        return pieces, blocks
+
+    def render(self, fixed_positions, mobile_positions, simulation_time, tx_range, interference_range,
+               random_seed=None) -> str:
+        has_mobile = bool(mobile_positions)
+        params = _params(fixed_positions, mobile_positions, simulation_time, tx_range, interference_range, random_seed)
+        if params["random_seed"] is None:
+            params["random_seed"] = self._random_seed
+        if has_mobile not in self._skeletons:
+            try:
+                self._skeletons[has_mobile] = self._compile(has_mobile)
+            except ValueError as e:
+                logger.warning(f"{self.input_file}: cannot compile template ({e}); using the full render")
+                self._skeletons[has_mobile] = None
+        skeleton = self._skeletons[has_mobile]
+        if skeleton is None:
+            return self._render_full(has_mobile, params)
+
+        pieces, blocks = skeleton
+        values = {k: params[k] for k in _FIELDS}
+        values.update({f"MOTES:{kind}": [] for kind in blocks})
+        for mote_id, x, y in params["motes"]:
+            kind = "server" if mote_id in self.root_motes else "client"
+            if kind in blocks:
+                values[f"MOTES:{kind}"].append(blocks[kind].format(x=x, y=y, id=mote_id))
+        out = list(pieces)
+        for i in range(1, len(out), 2):
+            value = values[out[i]]
+            out[i] = "".join(value) if isinstance(value, list) else value
+        text = "".join(out)
+
+        if has_mobile not in self._verified:
+            full = self._render_full(has_mobile, params)
+            if full != text:
+                logger.warning(f"{self.input_file}: compiled template differs from the full render; using the full render")
+                self._skeletons[has_mobile] = None
+                return full
+            self._verified.add(has_mobile)
+        return text
+
+    def write(self, output_file, *args, **kwargs) -> None:
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(self.render(*args, **kwargs))
+
+
+_TEMPLATES: dict[tuple, SimulationTemplate] = {}
+
+
+def load_template(input_file, root_motes: list[int], positions_file: str | None = None) -> SimulationTemplate:
+    """Template em cache, relido apenas se o arquivo mudar."""
+    st = os.stat(input_file)
+    key = (os.path.abspath(input_file), st.st_mtime_ns, st.st_size, tuple(root_motes), positions_file)
+    template = _TEMPLATES.get(key)
+    if template is None:
+        template = _TEMPLATES[key] = SimulationTemplate(input_file, root_motes, positions_file)
+    return template
+
+
+def update_simulation_xml(
+    fixed_positions: list[tuple[float, float]],
+    mobile_positions: list[tuple[float, float]],
+    root_motes: list[int],
+    simulation_time: float,
+    tx_range: float,
+    interference_range: float,
+    input_file: str,
+    output_file: str,
+    positions_file: str | None = None,
+    random_seed: int | None = None
+) -> None:
+    """Atualiza arquivo XML de simulação com novos parâmetros.
     
-    logger.info(f"File {output_file} generated successfully!")
\ No newline at end of file
+    Args:
+        fixed_positions: Lista de tuplas (x, y) com posições fixas
+        mobile_positions: Lista de tuplas (x, y) com posições iniciais dos móveis
+        root_motes: Lista de IDs dos motes servidores
+        simulation_time: Tempo de simulação em minutos
+        tx_range: Alcance de transmissão
+        interference_range: Alcance de interferência
+        inputFile: Caminho do arquivo XML de entrada (template)
+        outputFile: Caminho do arquivo XML de saída
+        positions_file: Caminho do positions.dat lido pelo plugin Mobility (None mantém o do template)
+        random_seed: Semente do Cooja (<randomseed>); None mantém a do template
+    """
+    template = load_template(input_file, root_motes, positions_file)
+    template.write(output_file, fixed_positions, mobile_positions, simulation_time, tx_range, interference_range,
+                   random_seed=random_seed)
+
+    logger.info(f"File {output_file} generated successfully!")
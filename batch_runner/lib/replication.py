@@ -0,0 +1,222 @@
+import math
+from statistics import NormalDist
+
+from .pareto import MINIMIZE, OBJECTIVES
+
+# Parada de um design
+PRECISION = "precision"
+DOMINATED = "dominated"
+BUDGET = "budget"
+FAILED = "failed"
+
+# Separador entre o design e o índice da réplica no nome do job
+REP_SEP = "/rep-"
+
+
+def replicate_name(design: str, k: int) -> str:
+    """Nome do job da réplica k de um design (também o subdiretório dos resultados)."""
+    return f"{design}{REP_SEP}{k}"
+
+
+def split_replicate(name: str) -> tuple[str, int]:
+    design, _, rep = name.rpartition(REP_SEP)
+    return design, int(rep)
+
+
+def t_cdf(t: float, df: int) -> float:
+    """
+    Distribuição acumulada da t de Student para 'df' inteiro, pelas somas
+    finitas de Abramowitz & Stegun 26.7.3 (df ímpar) e 26.7.4 (df par).
+    """
+    theta = math.atan2(abs(t), math.sqrt(df))
+    c2 = math.cos(theta) ** 2
+    if df % 2:
+        term, total = 1.0, 0.0
+        for k in range(1, (df - 1) // 2 + 1):  # 1 + 2/3 cos² + (2·4)/(3·5) cos⁴ ...
+            total += term
+            term *= 2 * k / (2 * k + 1) * c2
+        a = 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+    else:
+        term, total = 1.0, 0.0
+        for k in range(1, df // 2 + 1):  # 1 + 1/2 cos² + (1·3)/(2·4) cos⁴ ...
+            total += term
+            term *= (2 * k - 1) / (2 * k) * c2
+        a = math.sin(theta) * total
+    return (1 + a) / 2 if t >= 0 else (1 - a) / 2
+
+
+def t_quantile(p: float, df: int) -> float:
+    """
+    Quantil p da t de Student com 'df' graus de liberdade. A expansão de
+    Cornish-Fisher em torno da normal (Abramowitz & Stegun 26.7.5) dá o ponto
+    de partida, refinado por Newton sobre a acumulada exata (t_cdf): com poucas
+    réplicas (df = 1, 2, ...) a expansão sozinha erra bastante.
+    """
+    z = NormalDist().inv_cdf(p)
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    g1 = (z**3 + z) / 4
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160
+    t = z + g1 / df + g2 / df**2 + g3 / df**3 + g4 / df**4
+    log_norm = math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - 0.5 * math.log(df * math.pi)
+    for _ in range(20):
+        density = math.exp(log_norm - (df + 1) / 2 * math.log1p(t * t / df))
+        step = (t_cdf(t, df) - p) / density
+        t -= step
+        if abs(step) <= 1e-12 * max(1.0, abs(t)):
+            break
+    return t
+
+
+def mean_ci(samples: list[float], confidence: float) -> tuple[float, float]:
+    """Média e meia-largura do intervalo de confiança t; amostras NaN são ignoradas."""
+    xs = [x for x in samples if not math.isnan(x)]
+    n = len(xs)
+    if n == 0:
+        return math.nan, math.inf
+    mean = sum(xs) / n
+    if n == 1:
+        return mean, math.inf
+    var = sum((x - mean) ** 2 for x in xs) / (n - 1)
+    return mean, t_quantile(0.5 + confidence / 2, n - 1) * math.sqrt(var / n)
+
+
+class AdaptiveReplication:
+    """
+    Decide quantas réplicas (sementes distintas do Cooja) simular por design.
+
+    Cada design começa com 'min_replicates' réplicas. Quando todas as réplicas
+    lançadas terminam, ele para se:
+    - em todo objetivo, a meia-largura do intervalo de confiança é no máximo
+      'rel_precision' vezes |média| (precision);
+    - outro design o domina com folga: o pior extremo do intervalo do outro é
+      ao menos tão bom quanto o melhor extremo do seu em todo objetivo, e
+      melhor em algum (dominated) — mais réplicas não mudariam o front;
+    - já foram lançadas 'max_replicates' réplicas (budget).
+    Caso contrário, lança quantas réplicas a meia-largura atual indica serem
+    necessárias (n * (meia-largura / alvo)^2), ao menos uma. Réplicas que
+    falham contam para o orçamento, mas não trazem amostra; objetivos NaN em
+    todas as réplicas não entram no critério de precisão.
+    """
+
+    def __init__(self, min_replicates: int, max_replicates: int, confidence: float = 0.95,
+                 rel_precision: float = 0.05):
+        self.max_replicates = max(1, int(max_replicates))
+        self.min_replicates = min(self.max_replicates, max(2, int(min_replicates)))
+        self.confidence = confidence
+        self.rel_precision = rel_precision
+        self.samples: dict[str, dict[int, dict[str, float]]] = {}
+        self.launched: dict[str, int] = {}
+        self.outstanding: dict[str, set[int]] = {}
+        self.stopped: dict[str, str] = {}
+
+    def start(self, design: str) -> list[int]:
+        """Réplicas iniciais de um design novo."""
+        self.samples[design] = {}
+        self.launched[design] = 0
+        self.outstanding[design] = set()
+        self.stopped.pop(design, None)
+        return self._launch(design, self.min_replicates)
+
+    def _launch(self, design: str, count: int) -> list[int]:
+        first = self.launched[design]
+        count = min(count, self.max_replicates - first)
+        ks = list(range(first, first + count))
+        self.launched[design] += count
+        self.outstanding[design].update(ks)
+        return ks
+
+    def add(self, design: str, k: int, objectives: dict[str, float]):
+        self.outstanding[design].discard(k)
+        self.samples[design][k] = {name: float(objectives.get(name, math.nan)) for name in OBJECTIVES}
+
+    def failed(self, design: str, k: int):
+        self.outstanding[design].discard(k)
+
+    def settled(self, design: str) -> bool:
+        """Todas as réplicas lançadas já terminaram."""
+        return not self.outstanding[design]
+
+    def active(self) -> bool:
+        """Algum design ainda aguarda réplicas."""
+        return any(self.outstanding.values())
+
+    def intervals(self, design: str) -> dict[str, tuple[float, float]]:
+        """(média, meia-largura) de cada objetivo."""
+        samples = list(self.samples[design].values())
+        return {name: mean_ci([s[name] for s in samples], self.confidence) for name in OBJECTIVES}
+
+    def dominated_by(self, design: str) -> str | None:
+        """Um design que domina 'design' mesmo no pior caso dos intervalos, se houver."""
+        mine = self.intervals(design)
+        for other in self.samples:
+            if other == design or len(self.samples[other]) < 2:
+                continue
+            theirs = self.intervals(other)
+            strictly = False
+            for name, minimize in zip(OBJECTIVES, MINIMIZE):
+                (m, h), (o, ho) = mine[name], theirs[name]
+                # pior extremo do outro contra o melhor extremo deste
+                worst, best = (o + ho, m - h) if minimize else (-(o - ho), -(m + h))
+                if not worst <= best:  # também falso com NaN
+                    break
+                strictly = strictly or worst < best
+            else:
+                if strictly:
+                    return other
+        return None
+
+    def next(self, design: str) -> list[int]:
+        """
+        Próximas réplicas de um design cujas réplicas lançadas terminaram; vazio
+        quando ele para (o motivo fica em 'stopped').
+        """
+        if not self.samples[design]:
+            self.stopped[design] = FAILED  # nenhuma réplica concluída
+            return []
+        ci = self.intervals(design)
+        needed = 0
+        for mean, half in ci.values():
+            if math.isnan(mean):
+                continue  # objetivo ausente em todas as réplicas
+            target = self.rel_precision * abs(mean)
+            if not half <= target:  # inf ou NaN: sem amostras suficientes
+                n = len(self.samples[design])
+                needed = max(needed, math.ceil(n * (half / target) ** 2) - n if n >= 2 and target > 0 else 1)
+
+        if needed == 0:
+            self.stopped[design] = PRECISION
+        elif (other := self.dominated_by(design)) is not None:
+            self.stopped[design] = f"{DOMINATED} by {other}"
+        elif self.launched[design] >= self.max_replicates:
+            self.stopped[design] = BUDGET
+        else:
+            return self._launch(design, max(1, needed))
+        return []
+
+    def summary(self, design: str, seed_base: int = 0) -> dict:
+        """Resumo gravado em replicates.json: médias, intervalos e amostras por objetivo."""
+        ci = self.intervals(design)
+        ks = sorted(self.samples[design])
+        return {
+            "confidence": self.confidence,
+            "replicates": len(ks),
+            "launched": self.launched[design],
+            "seeds": [seed_base + k for k in ks],
+            "stopped": self.stopped.get(design),
+            "objectives": {
+                name: {
+                    "mean": mean,
+                    "half_width": half,
+                    "lower": mean - half,
+                    "upper": mean + half,
+                    "samples": [self.samples[design][k][name] for k in ks],
+                }
+                for name, (mean, half) in ci.items()
+            },
+        }
+
+    def means(self, design: str) -> dict[str, float]:
+        return {name: mean for name, (mean, _) in self.intervals(design).items()}
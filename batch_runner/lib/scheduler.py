@@ -0,0 +1,162 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Item de um iterador de jobs que ainda não tem job pronto (p.ex. aguardando
+# novas entradas): o despacho é retomado após Scheduler.poll segundos, ou
+# assim que algum job terminar (o resultado pode gerar novos jobs).
+IDLE = object()
+
+
+class Worker:
+    """Um container Cooja (ou a máquina local), com 'concurrency' vagas de simulação.
+
+    Além das vagas de simulação, até 'prefetch' jobs extras podem ser despachados
+    ao worker para prepararem seus arquivos (build, upload) enquanto os anteriores
+    simulam; a simulação em si só começa dentro de run_slot().
+    """
+
+    def __init__(self, host: str, port: int = 22, user: str = "", password: str = "", concurrency: int = 1,
+                 name: str | None = None, prefetch: int = 1):
+        self.host = host
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.concurrency = max(1, int(concurrency))
+        self.prefetch = max(0, int(prefetch))
+        self.name = name or f"{host}:{port}"
+        self.active = 0
+        self._run_slots = threading.BoundedSemaphore(self.concurrency)
+
+    @property
+    def load(self) -> float:
+        return self.active / self.concurrency
+
+    def has_free_slot(self) -> bool:
+        return self.active < self.concurrency + self.prefetch
+
+    def run_slot(self):
+        """Vaga de simulação: adquirida só durante a execução do Cooja."""
+        return self._run_slots
+
+    def __repr__(self) -> str:
+        return f"Worker({self.name}, {self.active}/{self.concurrency})"
+
+
+class Scheduler:
+    """Distribui jobs entre as vagas dos workers e entrega os resultados à medida que terminam.
+
+    Cada job é despachado para o worker menos carregado (vagas ocupadas / concorrência)
+    que tenha vaga livre. A execução ocorre em threads (o trabalho é dominado por E/S
+    remota), e o despacho acontece apenas na thread que itera sobre run().
+
+    Um job que falha é repetido até 'retries' vezes, após backoff * 2**(tentativa - 1)
+    segundos, em um worker em que ainda não falhou (se houver algum).
+    """
+
+    def __init__(self, workers: list[dict | Worker], retries: int = 0, backoff: float = 5.0, poll: float = 5.0):
+        self.workers = [w if isinstance(w, Worker) else Worker(**w) for w in workers]
+        if not self.workers:
+            raise ValueError("At least one worker is required")
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.poll = poll
+        self._lock = threading.Lock()
+
+    @property
+    def slots(self) -> int:
+        return sum(w.concurrency for w in self.workers)
+
+    @property
+    def capacity(self) -> int:
+        """Jobs despachados simultaneamente (vagas de simulação + prefetch)."""
+        return sum(w.concurrency + w.prefetch for w in self.workers)
+
+    def _least_loaded(self, avoid=()) -> Worker | None:
+        if len(avoid) >= len(self.workers):
+            avoid = ()
+        free = [w for w in self.workers if w.has_free_slot() and w.name not in avoid]
+        return min(free, key=lambda w: w.load) if free else None
+
+    def run(self, jobs, fn, label=str):
+        """Executa fn(job, worker) para cada job; gera (job, worker, resultado, erro) ao terminar.
+
+        'jobs' pode ser um iterador: novos jobs só são consumidos quando há vaga,
+        portanto a preparação de um job (p.ex. em um gerador) se sobrepõe à
+        execução dos anteriores. Um iterador que ainda não tem o próximo job
+        gera IDLE; os jobs em execução continuam sendo entregues enquanto isso, e
+        o iterador é consultado de novo após 'poll' segundos ou quando algum termina.
+
+        Exatamente um entre resultado e erro é None: jobs que esgotam as tentativas
+        são entregues com a última exceção, sem interromper os demais.
+        """
+        source = iter(jobs)
+        exhausted = False
+        idle_until = 0.0
+        # repetições agendadas: [job, tentativas, não antes de (monotonic), workers que falharam]
+        queue = []
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.capacity) as pool:
+            while True:
+                now = time.monotonic()
+                for entry in list(queue):
+                    job, attempts, not_before, avoid = entry
+                    if not_before > now:
+                        continue
+                    with self._lock:
+                        worker = self._least_loaded(avoid)
+                        if worker is None:
+                            continue
+                        worker.active += 1
+                    queue.remove(entry)
+                    running[pool.submit(fn, job, worker)] = (entry, worker)
+
+                while not exhausted and now >= idle_until:
+                    with self._lock:
+                        worker = self._least_loaded()
+                    if worker is None:
+                        break
+                    try:
+                        job = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if job is IDLE:
+                        idle_until = time.monotonic() + self.poll
+                        break
+                    with self._lock:
+                        worker.active += 1
+                    entry = [job, 0, 0.0, set()]
+                    running[pool.submit(fn, job, worker)] = (entry, worker)
+
+                if not queue and not running and exhausted:
+                    break
+
+                # acorda na próxima repetição agendada, na próxima consulta ao
+                # iterador ocioso, ou quando algum job terminar
+                delayed = [e[2] for e in queue if e[2] > now]
+                if not exhausted and idle_until > now:
+                    delayed.append(idle_until)
+                timeout = min(delayed) - now if delayed else None
+                if not running:
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if done:
+                    idle_until = 0.0
+                for fut in done:
+                    entry, worker = running.pop(fut)
+                    with self._lock:
+                        worker.active -= 1
+                    job, attempts, _, avoid = entry
+                    exc = fut.exception()
+                    if exc is None:
+                        yield job, worker, fut.result(), None
+                    elif attempts < self.retries:
+                        delay = self.backoff * 2 ** attempts
+                        print(f"[RETRY] {label(job)} failed @ {worker.name} ({exc!r}); retrying in {delay:.0f}s")
+                        queue.append([job, attempts + 1, time.monotonic() + delay, avoid | {worker.name}])
+                    else:
+                        yield job, worker, None, exc
@@ -0,0 +1,126 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from paramiko import SSHClient, AutoAddPolicy, SSHException, ChannelException
+
+# Canais abertos ao mesmo tempo por job: o stream do Cooja mais um comando
+# curto (kill/limpeza) ou a sessão SFTP do upload
+CHANNELS_PER_JOB = 2
+
+
+class SSHPool:
+    """Mantém uma conexão SSH autenticada por worker e multiplexa canais sobre ela.
+
+    Cada exec_command e cada sessão SFTP abre apenas um canal no transporte já
+    autenticado, em vez de um novo handshake TCP + autenticação por job. Se o
+    transporte cair, a conexão é refeita de forma transparente na próxima abertura
+    de canal. O tempo gasto em handshakes fica em 'stats' (por worker).
+
+    O sshd limita os canais simultâneos por conexão (MaxSessions, 10 por padrão
+    no OpenSSH; 'max_sessions' deve refleti-lo). Cada job despachado usa até
+    CHANNELS_PER_JOB canais ao mesmo tempo, o que check_capacity() confere
+    contra as vagas do worker. Um canal recusado (ChannelException) não derruba
+    a conexão, que é compartilhada pelos demais jobs: a abertura é repetida
+    até 'channel_wait' segundos.
+    """
+
+    def __init__(self, connect_timeout: float = 15.0, keepalive: int = 30, max_sessions: int = 10,
+                 channel_wait: float = 60.0):
+        self.connect_timeout = connect_timeout
+        self.keepalive = keepalive
+        self.max_sessions = max_sessions
+        self.channel_wait = channel_wait
+        self._clients: dict[str, SSHClient] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.stats: dict[str, dict[str, float]] = {}
+
+    def _lock_for(self, worker) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(worker.name, threading.Lock())
+
+    def _connect(self, worker) -> SSHClient:
+        start = time.perf_counter()
+        ssh = SSHClient()
+        ssh.set_missing_host_key_policy(AutoAddPolicy())
+        ssh.connect(
+            worker.host,
+            port=worker.port,
+            username=worker.user,
+            password=worker.password,
+            timeout=self.connect_timeout,
+        )
+        ssh.get_transport().set_keepalive(self.keepalive)
+        elapsed = time.perf_counter() - start
+
+        st = self.stats.setdefault(worker.name, {"connects": 0, "connect_time": 0.0})
+        st["connects"] += 1
+        st["connect_time"] += elapsed
+        print(f"[ssh] connected to {worker.name} in {elapsed:.3f}s")
+        return ssh
+
+    def check_capacity(self, worker) -> None:
+        """Falha se os jobs simultâneos do worker podem exceder MaxSessions."""
+        needed = CHANNELS_PER_JOB * (worker.concurrency + worker.prefetch)
+        if needed > self.max_sessions:
+            raise ValueError(
+                f"{worker.name}: {worker.concurrency + worker.prefetch} concurrent job(s) need up to {needed} "
+                f"SSH channels, above max_sessions={self.max_sessions}; lower the concurrency or raise "
+                f"MaxSessions in the worker's sshd_config"
+            )
+
+    def client(self, worker, failed: SSHClient | None = None) -> SSHClient:
+        """
+        Conexão do worker. É refeita só se o transporte caiu ou se 'failed' (a
+        conexão em que o chamador falhou) ainda é a atual: uma conexão nova,
+        aberta por outra thread nesse meio-tempo, nunca é fechada.
+        """
+        with self._lock_for(worker):
+            ssh = self._clients.get(worker.name)
+            transport = ssh.get_transport() if ssh is not None else None
+            if transport is None or not transport.is_active() or (failed is not None and ssh is failed):
+                if ssh is not None:
+                    ssh.close()
+                ssh = self._clients[worker.name] = self._connect(worker)
+            return ssh
+
+    def _with_retry(self, worker, open_channel):
+        deadline = time.monotonic() + self.channel_wait
+        delay = 0.1
+        while True:
+            ssh = self.client(worker)
+            try:
+                return open_channel(ssh)
+            except ChannelException:
+                # MaxSessions atingido: o transporte segue ativo, aguarda um canal livre
+                if time.monotonic() + delay > deadline:
+                    raise
+                time.sleep(delay)
+                delay = min(2 * delay, 2.0)
+            except (SSHException, EOFError, OSError):
+                return open_channel(self.client(worker, failed=ssh))
+
+    def exec(self, worker, cmd: str, get_pty: bool = False):
+        """Abre um canal exec e retorna (stdin, stdout, stderr) como em SSHClient.exec_command."""
+        return self._with_retry(worker, lambda ssh: ssh.exec_command(cmd, get_pty=get_pty))
+
+    def run(self, worker, cmd: str) -> int:
+        """Executa cmd e aguarda o status de saída."""
+        stdin, stdout, stderr = self.exec(worker, cmd)
+        return stdout.channel.recv_exit_status()
+
+    @contextmanager
+    def sftp(self, worker):
+        """Sessão SFTP em um canal próprio do transporte compartilhado."""
+        sftp = self._with_retry(worker, lambda ssh: ssh.open_sftp())
+        try:
+            yield sftp
+        finally:
+            sftp.close()
+
+    def close(self):
+        with self._guard:
+            for ssh in self._clients.values():
+                ssh.close()
+            self._clients.clear()
@@ -1,5 +1,10 @@
 import numpy as np
 import json
+import argparse
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Bibliotecas locais
@@ -7,320 +12,427 @@ from utils.sim_utils import load_simulation_json
 from utils.sim_utils import make_mobile_trajectory_fn
 from utils.plot_utils import plot_installed_graph
 from utils.plot_utils import plot_candidates_and_paths
-
-# Gurobi
-try:
-    import gurobipy as gp
-    from gurobipy import GRB
-except Exception as e:
-    raise RuntimeError("Este script requer 'gurobipy'. Instale e garanta uma licença ativa do Gurobi.") from e
+from utils.artifact_writer import ArtifactWriter, write_text
+from utils.model_data import build_node_registry, node_positions
+from utils.model_data import build_link_geometry, build_edges, group_edges
+from utils.flow_io import pack_flows, save_flows, load_flows, flows_to_routes
+from utils.gif_utils import save_routes_animations
 
 # Parâmetros do programa
 SIM_JSON_PATH = "./input.json"   # ajuste conforme necessário
 RESULTS_PATH = Path("./output")
+PLOT_DPI = 150
 
-# Inicializações de parâmetros adicionais
-# 1) Carrega JSON base
-sim = load_simulation_json(SIM_JSON_PATH)
-
-
-# Dados de entrada advindos do arquivo JSON
-duration = int(sim.get("duration", 60))
-mobile_ts = [int(m.get("timeStep", 1)) for m in sim["simulationElements"]["mobileMotes"]]
-dt = max(1, min(mobile_ts) if mobile_ts else 1)
-T = max(1, duration // dt)
-
-R_comm   = float(sim.get("radiusOfReach", 50.0))
-R_interf = float(sim.get("radiusOfInter", 60.0))
-region   = sim.get("region", [-200, -200, 200, 200])
-
-fixed_list  = sim["simulationElements"]["fixedMotes"]
-mobile_list = sim["simulationElements"]["mobileMotes"]
+# Marcadores da varredura em --export-dir (lidos pelo batch_runner em modo streaming):
+# SWEEP_RUNNING existe enquanto a varredura roda, com o identificador dela e o
+# pid, e tem o mtime renovado a cada SWEEP_HEARTBEAT segundos; SWEEP_DONE é
+# gravado ao fim, com o mesmo identificador, antes de SWEEP_RUNNING ser removido.
+SWEEP_DONE = "sweep.done"
+SWEEP_RUNNING = "sweep.running"
+SWEEP_HEARTBEAT = 10.0
 
 # ------------------------------
 # Parâmetros do modelo (modelo mobile)
 # ------------------------------
 w_install  = 1000.0**2 # peso w da função objetivo para instalação de motes
 
-plot_candidates = False
-
-def binary_string_y(y_val, J) -> str:
-    J_sorted = sorted(J, key=lambda j: j[1])  # ordena pelo nome
+def binary_string_y(y_val, names) -> str:
+    """Cromossomo: y_val[k] do candidato de nome names[k], ordenado pelo nome."""
+    order = sorted(range(len(names)), key=lambda k: names[k])  # ordena pelo nome
     return "".join(
-        "1" if y_val[j] > 0.5 else "0"
-        for j in J_sorted
+        "1" if y_val[k] > 0.5 else "0"
+        for k in order
     )
 
-genotipe = set()
-
-for C0 in range(10, 1110, 100): # capacidade máxima nominal (C_0)
-    for kdecay in [0.9, 0.75, 0.5, 0.25, 0.1]: # fator de atenuação (k_decay)
-        for B in range(1, 101, 2): # carga por mote móvel
-            print(f"loop: C0={C0} kdecay={kdecay} B={B}")
-            # Dicionário de motes
-            sink_name = None  # nome do sink
-            for fm in fixed_list:
-                if fm.get("name", "").lower() == "root":
-                    sink_name = fm["name"]
-                    break
-            if sink_name is None and fixed_list:
-                sink_name = fixed_list[0]["name"]
-
-            sink = ("sink", sink_name)
-            p_sink = None
-            J = []           # fixos candidatos (exclui sink)
-            p_cand = {}      # ("j", name) -> np.array([x,y])
-
-            for fm in fixed_list:
-                name = str(fm["name"])
-                pos = np.array(fm["position"], dtype=float)
-                if name == sink_name:
-                    p_sink = pos
-                else:
-                    J.append(("j", name))
-                    p_cand[("j", name)] = pos
-
-            if p_sink is None:
-                raise ValueError("Não foi possível determinar a posição do sink.")
-
-            # Móveis e trajetórias discretas
-            mob_names = [m["name"] for m in mobile_list]
-            r_mobile_by_name = {}
-            for m in mobile_list:
-                name      = m["name"]
-                fpath     = m["functionPath"]
-                is_closed = bool(m.get("isClosed", False))
-                is_round  = bool(m.get("isRoundTrip", False))
-                speed     = float(m.get("speed", 1.0))
-                r_fn      = make_mobile_trajectory_fn(fpath, is_closed, is_round, T, speed)
-                r_mobile_by_name[name] = r_fn
-
-            def r_mobile(name: str, tau: int):
-                return r_mobile_by_name[name](tau)
-
-            def pos_node(n, t: int):
-                """Posição espacial p_i(t) do nó i no instante t, conforme o modelo mobile."""
-                if n[0] == "sink":
-                    return p_sink
-                if n[0] == "j":   # candidato fixo
-                    return p_cand[n]
-                if n[0] == "m":   # móvel
-                    return r_mobile(n[1], t)
-                raise ValueError(f"Nó desconhecido: {n}")
-
-            # Demanda: cada móvel gera B unidade por tempo (b_{m,t} = B)
-            b = {(name, t): B for name in mob_names for t in range(1, T + 1)}
-
-            # ==============================
-            # Modelo Gurobi
-            # ==============================
-
-            mdl = gp.Model("WSN_Mobile_Coverage_Problem")
-            mdl.Params.OutputFlag = 0  # 0 para silenciar logs
-
-            # --------------------------------------------
-            # Funções auxiliares: capacidade C_ij(t) e energia e_ij(t)
-            # --------------------------------------------
-            def capacity(pi: np.ndarray, pj: np.ndarray) -> float:
-                """C_{ij}(t) = max{0, C0 * (1 - kdecay * d)^2} conforme o modelo mobile."""
-                d = np.linalg.norm(pi - pj)
-                return max(0.0, C0 * (1.0 - kdecay * d) ** 2)
-
-            def energy_cost(pi: np.ndarray, pj: np.ndarray) -> float:
-                """
-                e_{ij}(t) conforme o modelo:
-                    d^2,                       se 0 < d <= R_comm
-                    (R_interf - d)^2,          se R_comm < d <= R_interf
-                    0,                         caso contrário.
-                No modelo mobile, (i,j) ∈ E_t implica d <= R_comm, então na prática
-                entra sempre o primeiro ramo, mas mantemos a forma geral.
-                """
-                d = np.linalg.norm(pi - pj)
-                if 0.0 < d <= R_comm:
-                    return d ** 2
-                elif R_comm < d <= R_interf:
-                    return (R_interf - d) ** 2
-                else:
-                    return 0.0
-
-            # --------------------------------------------
-            # Construção de E_t, C_{ij}(t), e_{ij}(t)
-            # --------------------------------------------
-            E_t = {}          # t -> lista de arestas (i,j)
-            C = {}            # (i,j,t) -> capacidade
-            e_cost = {}       # (i,j,t) -> e_{ij}(t)
-
-            for t in range(1, T + 1):
-                nodes_t = [sink] + J + [("m", name) for name in mob_names]
-                E_t[t] = []
-                for i in nodes_t:
-                    for j in nodes_t:
-                        if i == j:
-                            continue
-                        pi, pj = pos_node(i, t), pos_node(j, t)
-                        d = np.linalg.norm(pi - pj)
-                        # Definição de E_t pelo raio de comunicação (0 < d <= R_comm)
-                        if 0.0 < d <= R_comm:
-                            cap = capacity(pi, pj)
-                            if cap > 0.0:
-                                E_t[t].append((i, j))
-                                C[(i, j, t)] = cap
-                                e_cost[(i, j, t)] = energy_cost(pi, pj)
-
-            # --------------------------------------------
-            # Variáveis
-            #  - y_j: instalação de fixos (j ∈ J = F)
-            #  - z_ij(t): ativação da aresta (i,j) no slot t
-            #  - x_ij(t): fluxo na aresta (i,j) no slot t
-            # --------------------------------------------
-            y = {j: mdl.addVar(vtype=GRB.BINARY, name=f"y_{j[1]}") for j in J}  # j é ("j", name)
-
-            z = {}
-            xvar = {}
-            for t in range(1, T + 1):
-                for (i, j) in E_t[t]:
-                    z[(i, j, t)] = mdl.addVar(vtype=GRB.BINARY, name=f"z_{i}_{j}_t{t}")
-                    xvar[(i, j, t)] = mdl.addVar(lb=0.0, name=f"x_{i}_{j}_t{t}")
-
-            mdl.update()
 
+def solve_sweep(sim: dict, writer: ArtifactWriter | None = None, plots: bool = True, dpi: int = PLOT_DPI,
+                export_dir: Path | None = None, results_path: Path = RESULTS_PATH):
+    """
+    Varre (C0, kdecay, B) resolvendo o modelo mobile e grava um output-<chrom>.json
+    por cromossomo distinto. Os artefatos são entregues ao 'writer' (em segundo
+    plano) quando informado; caso contrário são gravados de forma síncrona.
+    Com 'export_dir', cada JSON novo também é publicado lá assim que encontrado
+    (p.ex. batch_runner/input, para simular enquanto a varredura continua).
+    Os artefatos vão para 'results_path' (por padrão, ./output).
+    """
+    # Gurobi
+    try:
+        import gurobipy as gp
+        from gurobipy import GRB
+    except Exception as e:
+        raise RuntimeError("Este script requer 'gurobipy'. Instale e garanta uma licença ativa do Gurobi.") from e
+
+    # Dados de entrada advindos do arquivo JSON
+    duration = int(sim.get("duration", 60))
+    mobile_ts = [int(m.get("timeStep", 1)) for m in sim["simulationElements"]["mobileMotes"]]
+    dt = max(1, min(mobile_ts) if mobile_ts else 1)
+    T = max(1, duration // dt)
+
+    R_comm   = float(sim.get("radiusOfReach", 50.0))
+    R_interf = float(sim.get("radiusOfInter", 60.0))
+    region   = sim.get("region", [-200, -200, 200, 200])
+
+    fixed_list  = sim["simulationElements"]["fixedMotes"]
+    mobile_list = sim["simulationElements"]["mobileMotes"]
+
+    def _submit(fn, *args, **kwargs):
+        if writer is None:
+            return fn(*args, **kwargs)
+        return writer.submit(fn, *args, **kwargs)
+
+    plot_candidates = not plots
+
+    # --------------------------------------------
+    # Registro de nós (ids inteiros) e geometria dos enlaces: não dependem de
+    # (C0, kdecay, B), então são montados uma única vez para toda a varredura
+    # --------------------------------------------
+    reg = build_node_registry(fixed_list, mobile_list)
+    N = len(reg["kind"])
+    cand_ids = reg["cand"]
+    cand_names = reg["name"][cand_ids].tolist()
+    mob_names = reg["name"][reg["mob"]].tolist()
+    p_sink = reg["fixed_pos"][0]
+
+    # Móveis e trajetórias discretas
+    r_mobile_by_name = {}
+    for m in mobile_list:
+        name      = m["name"]
+        fpath     = m["functionPath"]
+        is_closed = bool(m.get("isClosed", False))
+        is_round  = bool(m.get("isRoundTrip", False))
+        speed     = float(m.get("speed", 1.0))
+        r_fn      = make_mobile_trajectory_fn(fpath, is_closed, is_round, T, speed)
+        r_mobile_by_name[name] = r_fn
+
+    def r_mobile(name: str, tau: int):
+        return r_mobile_by_name[name](tau)
+
+    # Posições p_i(t) e arestas candidatas (0 < d <= R_comm) com e_ij(t)
+    pos = node_positions(reg, r_mobile_by_name, T)
+    geometry = build_link_geometry(pos, R_comm, R_interf)
+    del pos
+
+    # Fronteira de E/S: nós como tuplas ("j", nome) apenas para os plots
+    J = [("j", name) for name in cand_names]
+    p_cand = dict(zip(J, reg["fixed_pos"][1:]))
+
+    genotipe = set()
+
+    for C0 in range(10, 1110, 100): # capacidade máxima nominal (C_0)
+        for kdecay in [0.9, 0.75, 0.5, 0.25, 0.1]: # fator de atenuação (k_decay)
             # --------------------------------------------
-            # Objetivo (modelo mobile atualizado com throughput)
-            #   min  w * sum_j y_j  +  sum_t sum_(i,j) e_ij(t) * x_ij(t)  - lambda * sum_t sum_m g_m(t)
+            # E_t, C_{ij}(t), e_{ij}(t) em struct-of-arrays:
+            #   C_{ij}(t) = max{0, C0 * (1 - kdecay * d)^2}, mantidas as com C > 0
             # --------------------------------------------
-            obj_install = w_install * gp.quicksum(y[j] for j in J)
+            edges = build_edges(geometry, C0, kdecay)
+            src, dst, e_t = edges["src"], edges["dst"], edges["t"]
+            n_edges = len(src)
+
+            # Arestas agrupadas por (t, origem) e (t, destino)
+            out_order, out_bounds = group_edges(e_t.astype(np.int64) * N + src, (T + 1) * N)
+            in_order, in_bounds = group_edges(e_t.astype(np.int64) * N + dst, (T + 1) * N)
+
+            # Extremidades fixas (ids 1..nJ) -> índice do candidato em y
+            src_is_cand = (src >= 1) & (src <= len(cand_ids))
+            dst_is_cand = (dst >= 1) & (dst <= len(cand_ids))
+
+            for B in range(1, 101, 2): # carga por mote móvel
+                print(f"loop: C0={C0} kdecay={kdecay} B={B}")
+
+                # ==============================
+                # Modelo Gurobi
+                # ==============================
+
+                mdl = gp.Model("WSN_Mobile_Coverage_Problem")
+                mdl.Params.OutputFlag = 0  # 0 para silenciar logs
+
+                # --------------------------------------------
+                # Variáveis (indexadas pelo id do candidato / da aresta)
+                #  - y_j: instalação de fixos (j ∈ J = F)
+                #  - z_ij(t): ativação da aresta (i,j) no slot t
+                #  - x_ij(t): fluxo na aresta (i,j) no slot t
+                # --------------------------------------------
+                y = [mdl.addVar(vtype=GRB.BINARY) for _ in cand_ids]
+
+                z = []
+                xvar = []
+                for _ in range(n_edges):
+                    z.append(mdl.addVar(vtype=GRB.BINARY))
+                    xvar.append(mdl.addVar(lb=0.0))
+
+                mdl.update()
+
+                # --------------------------------------------
+                # Objetivo (modelo mobile atualizado com throughput)
+                #   min  w * sum_j y_j  +  sum_t sum_(i,j) e_ij(t) * x_ij(t)  - lambda * sum_t sum_m g_m(t)
+                # --------------------------------------------
+                obj_install = w_install * gp.quicksum(y)
+                obj_flow = gp.LinExpr(edges["cost"].tolist(), xvar)
+
+                mdl.setObjective(obj_install + obj_flow, GRB.MINIMIZE)
+
+                # --------------------------------------------
+                # Restrições (modelo mobile)
+                # --------------------------------------------
+
+                # (1) Capacidade: 0 ≤ x_ij(t) ≤ C_ij(t) * z_ij(t)
+                for e, cap in enumerate(edges["cap"].tolist()):
+                    mdl.addConstr(xvar[e] <= cap * z[e])
+
+                # (2) Instalação em fixos nas extremidades:
+                #     z_ij(t) ≤ y_i e z_ij(t) ≤ y_j quando i ou j ∈ J
+                #     (apenas quando a ponta é fixa; não há y para sink ou móveis)
+                for e, (i, j, i_fixed, j_fixed) in enumerate(zip(
+                    src.tolist(), dst.tolist(), src_is_cand.tolist(), dst_is_cand.tolist()
+                )):
+                    if i_fixed:  # i é um candidato fixo
+                        mdl.addConstr(z[e] <= y[i - 1])
+                    if j_fixed:  # j é um candidato fixo
+                        mdl.addConstr(z[e] <= y[j - 1])
+
+                def net_outflow(t: int, n: int):
+                    """sum_out - sum_in de x no nó n, slot t."""
+                    k = t * N + n
+                    out_e = out_order[out_bounds[k]:out_bounds[k + 1]].tolist()
+                    in_e = in_order[in_bounds[k]:in_bounds[k + 1]].tolist()
+                    return gp.LinExpr(
+                        [1.0] * len(out_e) + [-1.0] * len(in_e),
+                        [xvar[e] for e in out_e] + [xvar[e] for e in in_e]
+                    )
 
-            obj_flow = gp.quicksum(
-                e_cost[(i, j, t)] * xvar[(i, j, t)]
-                for t in range(1, T + 1)
-                for (i, j) in E_t[t]
-            )
+                # (3) Conservação de fluxo nos móveis: sum_out - sum_in = g_{m,t} (= B, carga por móvel)
+                for t in range(1, T + 1):
+                    for m in reg["mob"].tolist():
+                        mdl.addConstr(net_outflow(t, m) == B)
+
+                # (4) Conservação de fluxo nos fixos: sum_out - sum_in = 0
+                for t in range(1, T + 1):
+                    for j in cand_ids.tolist():
+                        mdl.addConstr(net_outflow(t, j) == 0.0)
+
+                # (5) Balanço no sink s: sum_in = sum_m g_{m,t}
+                for t in range(1, T + 1):
+                    k = t * N
+                    in_e = in_order[in_bounds[k]:in_bounds[k + 1]].tolist()
+                    inflow_s = gp.LinExpr([1.0] * len(in_e), [xvar[e] for e in in_e])
+                    mdl.addConstr(inflow_s == B * len(mob_names))
+
+                # --------------------------------------------
+                # Plots de candidatos
+                # --------------------------------------------
+                if not plot_candidates:
+                    plot_candidates = True  # gerada uma única vez, de forma síncrona
+                    plot_candidates_and_paths(
+                        F=J, q_fixed=p_cand, q_sink=p_sink, R_comm=R_comm,
+                        mob_names=mob_names, r_mobile=r_mobile, T=T, region=region,
+                        out_path="pic_candidates.jpg"
+                    )
 
-            mdl.setObjective(obj_install + obj_flow, GRB.MINIMIZE)
+                # Resolver
+                mdl.optimize()
+                status = mdl.Status
+                if status == GRB.INFEASIBLE:
+                    break
 
-            # --------------------------------------------
-            # Restrições (modelo mobile)
-            # --------------------------------------------
+                if status not in (GRB.OPTIMAL, GRB.SUBOPTIMAL):
+                    break
 
-            # (1) Capacidade: 0 ≤ x_ij(t) ≤ C_ij(t) * z_ij(t)
-            for t in range(1, T + 1):
-                for (i, j) in E_t[t]:
-                    mdl.addConstr(
-                        xvar[(i, j, t)] <= C[(i, j, t)] * z[(i, j, t)],
-                        name=f"cap_{i}_{j}_t{t}"
-                    )
+                # ==============================
+                # Pós-processamento e plots
+                # ==============================
 
-            # (2) Instalação em fixos nas extremidades:
-            #     z_ij(t) ≤ y_i e z_ij(t) ≤ y_j quando i ou j ∈ J
-            #     (apenas quando a ponta é fixa; não há y para sink ou móveis)
-            for t in range(1, T + 1):
-                for (i, j) in E_t[t]:
-                    if i[0] == "j":  # i é um candidato fixo
-                        mdl.addConstr(z[(i, j, t)] <= y[i], name=f"inst_i_{i}_{j}_t{t}")
-                    if j[0] == "j":  # j é um candidato fixo
-                        mdl.addConstr(z[(i, j, t)] <= y[j], name=f"inst_j_{i}_{j}_t{t}")
-
-            # (3) Conservação de fluxo nos móveis: sum_out - sum_in = g_{m,t}
-            for t in range(1, T + 1):
-                for name in mob_names:
-                    m_node = ("m", name)
-
-                    outflow = gp.quicksum(
-                        xvar[(m_node, j, t)] for (ii, j) in E_t[t] if ii == m_node
-                    )
-                    inflow = gp.quicksum(
-                        xvar[(i, m_node, t)] for (i, jj) in E_t[t] if jj == m_node
-                    )
+                # valores (extração em lote; x e z apenas para cromossomos novos)
+                y_val = np.array(mdl.getAttr("X", y), dtype=float)
+                is_installed = y_val > 0.5
 
-                    mdl.addConstr(
-                        outflow - inflow == b[(name, t)],
-                        name=f"flow_mobile_{name}_t{t}"
-                    )
+                chrom = binary_string_y(y_val, cand_names)
 
-            # (4) Conservação de fluxo nos fixos: sum_out - sum_in = 0
-            for t in range(1, T + 1):
-                for j_node in J:
-                    outflow = gp.quicksum(
-                        xvar[(j_node, v, t)] for (u, v) in E_t[t] if u == j_node
-                    )
-                    inflow = gp.quicksum(
-                        xvar[(u, j_node, t)] for (u, v) in E_t[t] if v == j_node
-                    )
-                    mdl.addConstr(outflow - inflow == 0.0,
-                                name=f"flow_fixed_{j_node}_t{t}")
+                if chrom in genotipe:
+                    continue
 
-            # (5) Balanço no sink s: sum_in = sum_m g_{m,t}
-            for t in range(1, T + 1):
-                inflow_s = gp.quicksum(
-                    xvar[(i, sink, t)] for (i, j) in E_t[t] if j == sink
-                )
-                total_gt = gp.quicksum(b[(name, t)] for name in mob_names)
-                mdl.addConstr(inflow_s == total_gt, name=f"flow_sink_t{t}")
+                genotipe.add(chrom)
 
-            # --------------------------------------------
-            # Plots de candidatos
-            # --------------------------------------------
-            if not plot_candidates:
-                plot_candidates = True
-                plot_candidates_and_paths(
-                    F=J, q_fixed=p_cand, q_sink=p_sink, R_comm=R_comm,
-                    mob_names=mob_names, r_mobile=r_mobile, T=T, region=region,
-                    out_path="pic_candidates.jpg"
-                )
+                x_all = mdl.getAttr("X", xvar)
+                z_all = mdl.getAttr("X", z)
 
-            # Resolver
-            mdl.optimize()
-            status = mdl.Status
-            if status == GRB.INFEASIBLE:
-                break
-
-            if status not in (GRB.OPTIMAL, GRB.SUBOPTIMAL):
-                break
-
-            # ==============================
-            # Pós-processamento e plots
-            # ==============================
-
-            # valores
-            y_val = {j: y[j].X for j in J}
-            installed = [j for j, v in y_val.items() if v > 0.5]
-            x_val = {(i, j, t): xvar[(i, j, t)].X
-                    for t in range(1, T + 1) for (i, j) in E_t[t]}
-            z_val = {(i, j, t): z[(i, j, t)].X
-                    for t in range(1, T + 1) for (i, j) in E_t[t]}
-
-            fixed_motes_out = []
-            fixed_motes_out.append({
-                "position": [float(p_sink[0]), float(p_sink[1])],
-                "name": "root",
-                "sourceCode": "node.c"
-            })
-            count = 1
-            for j_node in installed:
-                pos = p_cand[j_node]
+                fixed_motes_out = []
                 fixed_motes_out.append({
-                    "position": [float(pos[0]), float(pos[1])],
-                    "name": f"node{count}",
+                    "position": [float(p_sink[0]), float(p_sink[1])],
+                    "name": "root",
                     "sourceCode": "node.c"
                 })
-                count += 1
-
-            sim["simulationElements"]["fixedMotes"] = fixed_motes_out
+                count = 1
+                for pos in reg["fixed_pos"][1:][is_installed]:
+                    fixed_motes_out.append({
+                        "position": [float(pos[0]), float(pos[1])],
+                        "name": f"node{count}",
+                        "sourceCode": "node.c"
+                    })
+                    count += 1
+
+                sim["simulationElements"]["fixedMotes"] = fixed_motes_out
+
+                # JSON serializado aqui: 'sim' é mutado nas próximas iterações
+                results_path.mkdir(parents=True, exist_ok=True)
+                sim_text = json.dumps(sim, ensure_ascii=False, indent=4)
+                _submit(write_text, results_path / f"output-{chrom}.json", sim_text)
+                if export_dir is not None:
+                    _submit(write_text, export_dir / f"output-{chrom}.json", sim_text)
+
+                # Fluxos por slot (esparsos, ids inteiros) para animações/análises offline
+                flows = pack_flows(
+                    reg["kind"], reg["name"], src=src, dst=dst, t=e_t,
+                    x_vals=x_all, z_vals=z_all
+                )
+                _submit(
+                    save_flows, results_path / f"output-{chrom}.npz", flows,
+                    T=T, dt=dt, R_comm=R_comm, sink_pos=p_sink,
+                    cand_pos=reg["fixed_pos"][1:], installed=is_installed
+                )
 
-            chrom = binary_string_y(y_val, J)
+                if plots:
+                    installed = [j for j, inst in zip(J, is_installed) if inst]
+                    _submit(
+                        plot_installed_graph,
+                        installed=installed, q_fixed=p_cand, q_sink=p_sink, R_comm=R_comm,
+                        region=region, out_path=results_path / f"pic_installed_graph_{chrom}.png",
+                        dpi=dpi
+                    )
 
-            if chrom in genotipe:
-                continue
+                print("Done.")
+
+
+# ==============================
+# Renderização a posteriori
+# ==============================
+
+def _render_output(json_path: Path, dpi: int):
+    """Regera pic_installed_graph_<chrom>.png a partir de um output-<chrom>.json salvo."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        out = json.load(f)
+    fixed = out["simulationElements"]["fixedMotes"]
+    sink = next((fm for fm in fixed if fm["name"].lower() == "root"), fixed[0])
+    q_fixed = {("j", fm["name"]): np.array(fm["position"], dtype=float) for fm in fixed if fm is not sink}
+    chrom = json_path.stem.removeprefix("output-")
+    out_path = json_path.with_name(f"pic_installed_graph_{chrom}.png")
+    plot_installed_graph(
+        installed=list(q_fixed), q_fixed=q_fixed, q_sink=np.array(sink["position"], dtype=float),
+        R_comm=float(out.get("radiusOfReach", 50.0)), region=out.get("region", [-200, -200, 200, 200]),
+        out_path=out_path, dpi=dpi
+    )
+    return out_path
+
+
+def render_outputs(results_path: Path, workers: int | None = None, dpi: int = PLOT_DPI):
+    """Regera em paralelo as figuras de todos os output-*.json em results_path."""
+    json_files = sorted(Path(results_path).glob("output-*.json"))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for out_path in ex.map(_render_output, json_files, [dpi] * len(json_files)):
+            print(f"[OK] {out_path}")
+
+
+def animate_output(npz_path: Path, fmt: str = "gif", workers: int | None = None):
+    """
+    Gera routes/routes2 de um cromossomo a partir do output-<chrom>.npz salvo
+    (sem re-resolver), em anim-<chrom>/ ao lado do arquivo.
+    """
+    flows = load_flows(npz_path)
+    with open(npz_path.with_suffix(".json"), "r", encoding="utf-8") as f:
+        out = json.load(f)
+
+    T = int(flows["T"])
+    mobile_list = out["simulationElements"]["mobileMotes"]
+    r_mobile_by_name = {
+        m["name"]: make_mobile_trajectory_fn(
+            m["functionPath"], bool(m.get("isClosed", False)), bool(m.get("isRoundTrip", False)),
+            T, float(m.get("speed", 1.0))
+        )
+        for m in mobile_list
+    }
+
+    def r_mobile(name: str, tau: int):
+        return r_mobile_by_name[name](tau)
+
+    F = [("j", name) for kind, name in zip(flows["node_kind"], flows["node_name"]) if kind == "j"]
+    q_fixed = dict(zip(F, flows["cand_pos"]))
+    installed = [j for j, inst in zip(F, flows["installed"]) if inst]
+    x_val, E_t = flows_to_routes(flows)
+
+    chrom = npz_path.stem.removeprefix("output-")
+    return save_routes_animations(
+        installed, r_mobile, [m["name"] for m in mobile_list], flows["sink_pos"], q_fixed,
+        float(flows["R_comm"]), out.get("region", [-200, -200, 200, 200]),
+        x_val, E_t, T, F, npz_path.parent / f"anim-{chrom}", fmt=fmt, workers=workers
+    )
 
-            genotipe.add(chrom)
-            
-            RESULTS_PATH.mkdir(parents=True, exist_ok=True)
-            with open(RESULTS_PATH / f"output-{chrom}.json", "w", encoding="utf-8") as f:
-                json.dump(sim, f, ensure_ascii=False, indent=4)
 
-            plot_installed_graph(
-                installed=installed, q_fixed=p_cand, q_sink=p_sink, R_comm=R_comm,
-                region=region, out_path=RESULTS_PATH / f"pic_installed_graph_{chrom}.png"
-            )
+def start_heartbeat(path: Path, text: str, interval: float = SWEEP_HEARTBEAT) -> threading.Event:
+    """Grava 'path' e renova seu mtime a cada 'interval' segundos até o evento retornado ser setado."""
+    write_text(path, text)
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                write_text(path, text)
+
+    threading.Thread(target=beat, daemon=True).start()
+    return stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Varredura MILP do modelo mobile.")
+    parser.add_argument("command", nargs="?", choices=("solve", "render", "animate"), default="solve",
+                        help="solve: resolve a varredura; render: regera as figuras a partir de output/; "
+                             "animate: gera as animações de rotas a partir dos .npz em output/")
+    parser.add_argument("--no-plots", action="store_true", help="não gera figuras durante o solve")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="processos de gravação (solve) ou renderização (render)")
+    parser.add_argument("--queue", type=int, default=8, help="artefatos pendentes antes de bloquear o solver")
+    parser.add_argument("--dpi", type=int, default=PLOT_DPI, help="resolução das figuras")
+    parser.add_argument("--fmt", choices=("gif", "webp", "mp4"), default="gif", help="formato das animações")
+    parser.add_argument("--export-dir", type=Path, default=None,
+                        help="publica cada output-<chrom>.json novo também neste diretório (p.ex. "
+                             "../../batch_runner/input) e grava sweep.done ao terminar")
+    parser.add_argument("--output-dir", type=Path, default=RESULTS_PATH,
+                        help="diretório dos artefatos do solve (p.ex. um rascunho trocado por output/ "
+                             "só depois de uma varredura completa)")
+    args = parser.parse_args()
+
+    if args.command == "render":
+        render_outputs(RESULTS_PATH, workers=args.workers, dpi=args.dpi)
+        return
+
+    if args.command == "animate":
+        for npz_path in sorted(RESULTS_PATH.glob("output-*.npz")):
+            paths = animate_output(npz_path, fmt=args.fmt, workers=args.workers)
+            print(f"[OK] {npz_path.name} -> {', '.join(str(p) for p in paths.values())}")
+        return
+
+    sim = load_simulation_json(SIM_JSON_PATH)
+    if args.export_dir is None:
+        with ArtifactWriter(workers=args.workers, max_pending=args.queue) as writer:
+            solve_sweep(sim, writer=writer, plots=not args.no_plots, dpi=args.dpi, results_path=args.output_dir)
+        return
+
+    args.export_dir.mkdir(parents=True, exist_ok=True)
+    (args.export_dir / SWEEP_DONE).unlink(missing_ok=True)
+    marker = json.dumps({"sweep": uuid.uuid4().hex, "pid": os.getpid()})
+    heartbeat = start_heartbeat(args.export_dir / SWEEP_RUNNING, marker)
+    try:
+        with ArtifactWriter(workers=args.workers, max_pending=args.queue) as writer:
+            solve_sweep(sim, writer=writer, plots=not args.no_plots, dpi=args.dpi, export_dir=args.export_dir,
+                        results_path=args.output_dir)
+        # só depois que o writer gravou todos os JSONs
+        write_text(args.export_dir / SWEEP_DONE, marker)
+    finally:
+        # sem SWEEP_DONE, a remoção avisa o batch_runner de que a varredura falhou
+        heartbeat.set()
+        (args.export_dir / SWEEP_RUNNING).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
 
-            print("Done.")
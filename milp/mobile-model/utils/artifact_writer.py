@@ -0,0 +1,68 @@
+# artifact_writer.py
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+def write_text(path, text: str):
+    """Grava um texto já serializado (p.ex. JSON) em 'path', de forma atômica
+    (arquivo temporário + rename): quem observa o diretório nunca lê um arquivo pela metade."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return path
+
+
+class ArtifactWriter:
+    """
+    Pool de processos em segundo plano para gravar artefatos (JSON, figuras)
+    fora do laço do solver.
+    - workers: processos de gravação/renderização.
+    - max_pending: tamanho da fila; submit() bloqueia quando ela está cheia,
+      limitando a memória retida por tarefas ainda não executadas.
+    Os argumentos de cada tarefa devem ser picklable e não devem ser mutados
+    após o submit (serialize antes, como em write_text).
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8):
+        self._pool = ProcessPoolExecutor(max_workers=max(1, workers))
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._lock = threading.Lock()
+        self.errors = []
+
+    def submit(self, fn, *args, **kwargs):
+        self._slots.acquire()
+        try:
+            fut = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        fut.add_done_callback(self._done)
+        return fut
+
+    def _done(self, fut):
+        self._slots.release()
+        exc = fut.exception()
+        if exc is not None:
+            with self._lock:
+                self.errors.append(exc)
+
+    def close(self):
+        """Aguarda as tarefas pendentes; levanta a primeira falha ocorrida."""
+        self._pool.shutdown(wait=True)
+        if self.errors:
+            raise RuntimeError(f"{len(self.errors)} artefato(s) falharam") from self.errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            return False
+        self.close()
+        return False
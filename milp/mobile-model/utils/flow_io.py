@@ -0,0 +1,57 @@
+# flow_io.py
+import numpy as np
+from pathlib import Path
+
+FLOW_EPS = 1e-6
+
+
+def pack_flows(node_kind, node_name, src, dst, t, x_vals, z_vals, eps: float = FLOW_EPS) -> dict:
+    """
+    Compacta a solução (x_ij(t), z_ij(t)) em arrays esparsos indexados por inteiros.
+    - node_kind, node_name: tipo ('sink'/'j'/'m') e nome de cada nó, indexados pelo id.
+    - src, dst, t: ids de origem/destino e slot de cada aresta do modelo.
+    - x_vals, z_vals: valores da solução na mesma ordem das arestas.
+    Mantém apenas as arestas com fluxo > eps ou ativas (z > 0.5).
+    """
+    x_vals = np.asarray(x_vals, dtype=float)
+    active = np.asarray(z_vals, dtype=float) > 0.5
+    keep = (x_vals > eps) | active
+    return {
+        "node_kind": np.asarray(node_kind, dtype=str),
+        "node_name": np.asarray(node_name, dtype=str),
+        "src": np.asarray(src, dtype=np.int32)[keep],
+        "dst": np.asarray(dst, dtype=np.int32)[keep],
+        "t": np.asarray(t, dtype=np.int32)[keep],
+        "flow": x_vals[keep],
+        "active": active[keep],
+    }
+
+
+def save_flows(path, flows: dict, **extra):
+    """Grava os fluxos compactados (e metadados extras) em um .npz comprimido."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **flows, **extra)
+    return path
+
+
+def load_flows(path) -> dict:
+    with np.load(path, allow_pickle=False) as data:
+        return {k: data[k] for k in data.files}
+
+
+def flows_to_routes(flows: dict, eps: float = FLOW_EPS):
+    """
+    Converte os arrays do .npz para o formato usado em gif_utils:
+    x_val[(i, j, t)] e E_t[t] = [(i, j), ...], com nós como tuplas (tipo, nome).
+    """
+    nodes = list(zip(flows["node_kind"].tolist(), flows["node_name"].tolist()))
+    x_val, E_t = {}, {}
+    for s, d, t, x in zip(flows["src"].tolist(), flows["dst"].tolist(),
+                          flows["t"].tolist(), flows["flow"].tolist()):
+        if x <= eps:
+            continue
+        i, j = nodes[s], nodes[d]
+        x_val[(i, j, t)] = x
+        E_t.setdefault(t, []).append((i, j))
+    return x_val, E_t
@@ -1,271 +1,400 @@
-import os, io, shutil
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
+import os, shutil, subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+
+from .plot_utils import _break_jumps, _range_circles
+
 try:
-    from PIL import Image
+    from PIL import Image, GifImagePlugin
 except Exception as e:
     raise RuntimeError(
         "Este script requer 'Pillow' para gerar o GIF. Instale com: pip install pillow"
-    ) from e 
-    
+    ) from e
+
+
+# Paleta / estilo
+COLOR_SINK   = "blue"
+COLOR_FIXED0 = "gray"    # não instalado
+COLOR_FIXED1 = "green"   # instalado
+COLOR_MOBILE = "black"
+COLOR_LINK   = "red"
+
+S_SINK   = 260
+S_FIXED0 = 40
+S_FIXED1 = 120
+S_MOBILE = 80
+
+FLOW_EPS = 1e-6
+
+# Variantes de animação geradas na mesma passada sobre t:
+#   routes  -> círculo de alcance nos fixos instalados
+#   routes2 -> círculo de alcance nos móveis
+VARIANTS = {
+    "routes":  {"fixed_range": True,  "mobile_range": False, "traj_alpha": 0.5, "link_width": 2.2},
+    "routes2": {"fixed_range": False, "mobile_range": True,  "traj_alpha": 0.6, "link_width": 2.4},
+}
+
+FORMATS = ("gif", "webp", "mp4")
+
+# Sem ffmpeg, o WebP animado é montado pelo Pillow com todos os quadros em
+# memória: acima deste total (por animação) a geração é recusada.
+PILLOW_WEBP_MAX_BYTES = 1 << 30
+
+
+# ==============================
+# Renderização dos quadros
+# ==============================
+
+# Cena do processo atual (figura reutilizada entre quadros)
+_SCENE = None
+
 
-def _traj_with_breaks(r_mobile, name, T, close=False, jump_factor=5.0):
+def _build_scene(static):
     """
-    Gera uma trajetória shape (N,2) com linhas 'quebradas' (NaNs) em saltos grandes.
-    - close=False por padrão: não faz o wrap (evita risco entre último e primeiro).
-    - jump_factor controla a sensibilidade: quebra quando passo > jump_factor * mediana.
+    Monta a figura uma única vez com os artistas estáticos (fixos, sink,
+    trajetórias) e os artistas dinâmicos vazios (móveis, alcances e links),
+    que são apenas atualizados a cada quadro.
     """
-    pts = np.array([r_mobile(name, t) for t in range(1, T + 1)], dtype=float)
-
-    # Opcionalmente fechar (em geral, NÃO faça para caminhos abertos)
-    if close:
-        pts = np.vstack([pts, pts[0]])
-
-    # Distâncias entre pontos consecutivos
-    if len(pts) >= 2:
-        diffs = np.diff(pts, axis=0)
-        dists = np.linalg.norm(diffs, axis=1)
-        med = np.median(dists) if np.any(dists > 0) else 0.0
-        # limiar robusto: maior entre 1e-9 e mediana*jump_factor
-        thr = max(1e-9, med * jump_factor)
-
-        # Monta com NaNs onde houver salto
-        rows = [pts[0]]
-        for k in range(1, len(pts)):
-            if dists[k - 1] > thr:
-                rows.append([np.nan, np.nan])  # quebra a linha aqui
-            rows.append(pts[k])
-        pts = np.array(rows, dtype=float)
-    return pts    
+    fig = Figure(figsize=(10, 8), dpi=static["dpi"])
+    FigureCanvasAgg(fig)
+    ax = fig.gca()
+
+    cand = static["cand_pos"]
+    installed_mask = static["installed_mask"]
+    inst = cand[installed_mask]
+
+    # Fixos não instalados (cinza)
+    ax.scatter(cand[~installed_mask, 0], cand[~installed_mask, 1],
+               marker='s', s=S_FIXED0, c=COLOR_FIXED0, alpha=0.9)
+
+    # Fixos instalados (verde) + círculo de alcance (somente na variante 'routes')
+    ax.scatter(inst[:, 0], inst[:, 1], marker='s', s=S_FIXED1, c=COLOR_FIXED1)
+    fixed_range = _range_circles(ax, inst, static["R_comm"], edgecolors=COLOR_FIXED1, alpha=0.6)
+
+    # Sink (estrela azul)
+    q_sink = static["q_sink"]
+    ax.scatter([q_sink[0]], [q_sink[1]], marker='*', s=S_SINK, c=COLOR_SINK)
+
+    # Trajetórias (pretas, pontilhadas e leves para contexto)
+    trajs = [
+        ax.plot(traj[:, 0], traj[:, 1], linestyle=':', linewidth=2, c=COLOR_MOBILE)[0]
+        for traj in static["trajs"]
+    ]
+
+    # Posição atual dos móveis (pretos) + círculo de alcance (variante 'routes2')
+    n_mob = len(static["trajs"])
+    mobiles = ax.scatter(np.zeros(n_mob), np.zeros(n_mob), marker='o', s=S_MOBILE, c=COLOR_MOBILE)
+    mobile_range = _range_circles(ax, np.zeros((n_mob, 2)), static["R_comm"], edgecolors=COLOR_MOBILE, alpha=0.6)
+
+    # Links ativos (vermelho sólido)
+    links = LineCollection([], linestyles='-', colors=COLOR_LINK, alpha=0.95)
+    ax.add_collection(links)
+
+    title = ax.set_title("Rotas de comunicação (t = 0)")
+    ax.axis('equal')
+    ax.grid(True)
+    region = static["region"]
+    if region and len(region) == 4:
+        ax.set_xlim(region[0], region[2])
+        ax.set_ylim(region[1], region[3])
+    fig.tight_layout()
+
+    return {
+        "fig": fig, "title": title, "trajs": trajs, "mobiles": mobiles, "links": links,
+        "fixed_range": fixed_range, "mobile_range": mobile_range,
+        "variants": static["variants"], "frames_dir": static["frames_dir"],
+    }
 
 
-def save_routes_gif(
-    installed, r_mobile, mob_names, q_sink, q_fixed, R_comm, region,
-    x_val, E_t, T, F, out_dir_path: Path, *, jump_factor: float = 5.0, fps: int = 3
-):
-    # Paleta / estilo
-    COLOR_SINK   = "blue"
-    COLOR_FIXED0 = "gray"    # não instalado
-    COLOR_FIXED1 = "green"   # instalado
-    COLOR_MOBILE = "black"
-    COLOR_LINK   = "red"
-
-    S_SINK   = 260
-    S_FIXED0 = 40
-    S_FIXED1 = 120
-    S_MOBILE = 80
-
-    # Pasta de frames
-    frames_dir = out_dir_path / "frames_gif"
-    if os.path.isdir(frames_dir):
-        shutil.rmtree(frames_dir)
-    os.makedirs(frames_dir, exist_ok=True)
-
-    FLOW_EPS = 1e-6
-
-    # Trajetórias com quebras
-    traj_cache = {
-        name: _traj_with_breaks(r_mobile, name, T, close=False, jump_factor=jump_factor)
-        for name in mob_names
+def _init_worker(static):
+    global _SCENE
+    _SCENE = _build_scene(static)
+
+
+def _render_chunk(ts, mob_pos, segments):
+    """
+    Renderiza os quadros de um bloco de slots. Para cada t, retorna um dict
+    variante -> imagem RGB (H,W,3) uint8, com todas as variantes desenhadas
+    sobre a mesma figura.
+    """
+    scene = _SCENE
+    fig = scene["fig"]
+    out = []
+    for t, pm, segs in zip(ts, mob_pos, segments):
+        scene["mobiles"].set_offsets(pm)
+        scene["mobile_range"].set_offsets(pm)
+        scene["links"].set_segments(segs)
+        scene["title"].set_text(f"Rotas de comunicação (t = {t})")
+
+        frames = {}
+        for variant in scene["variants"]:
+            style = VARIANTS[variant]
+            scene["fixed_range"].set_visible(style["fixed_range"])
+            scene["mobile_range"].set_visible(style["mobile_range"])
+            for line in scene["trajs"]:
+                line.set_alpha(style["traj_alpha"])
+            scene["links"].set_linewidth(style["link_width"])
+
+            fig.canvas.draw()
+            rgb = np.asarray(fig.canvas.buffer_rgba())[:, :, :3].copy()
+            frames[variant] = rgb
+
+            if scene["frames_dir"] is not None:
+                frame_path = Path(scene["frames_dir"]) / variant / f"frame_{t:03d}.png"
+                Image.fromarray(rgb).save(frame_path, format="PNG")
+        out.append(frames)
+    return out
+
+
+def _iter_frames(static, mob_pos, segments, T, workers, chunk_size):
+    """
+    Gera os quadros em ordem de t. Com workers > 1 os blocos de slots são
+    renderizados em um pool de processos, mantendo no máximo 2*workers blocos
+    em voo para que a memória não cresça com T.
+    """
+    chunks = [range(s, min(s + chunk_size, T + 1)) for s in range(1, T + 1, chunk_size)]
+
+    def _task(ts):
+        return ts, mob_pos[ts.start - 1:ts.stop - 1], segments[ts.start - 1:ts.stop - 1]
+
+    if workers <= 1:
+        _init_worker(static)
+        for ts in chunks:
+            yield from _render_chunk(*_task(ts))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(static,)) as ex:
+        it = iter(chunks)
+        pending = deque(ex.submit(_render_chunk, *_task(ts)) for ts in islice(it, 2 * workers))
+        while pending:
+            frames = pending.popleft().result()
+            ts = next(it, None)
+            if ts is not None:
+                pending.append(ex.submit(_render_chunk, *_task(ts)))
+            yield from frames
+
+
+# ==============================
+# Codificadores incrementais
+# ==============================
+
+class _GifWriter:
+    """GIF escrito quadro a quadro (cada quadro com sua própria paleta)."""
+
+    def __init__(self, path: Path, fps: int):
+        self.fp = open(path, "wb")
+        self.duration = int(1000 / max(1, fps))
+        self.started = False
+
+    def write(self, rgb):
+        img = Image.fromarray(rgb).convert("P")
+        if not self.started:
+            header, _ = GifImagePlugin.getheader(img, info={"loop": 0})
+            for chunk in header:
+                self.fp.write(chunk)
+            self.started = True
+        for chunk in GifImagePlugin.getdata(img, duration=self.duration, include_color_table=True):
+            self.fp.write(chunk)
+
+    def close(self):
+        if self.started:
+            self.fp.write(b";")
+        self.fp.close()
+
+
+class _PillowWebpWriter:
+    """
+    Fallback sem ffmpeg: o Pillow não codifica WebP animado incrementalmente,
+    então os quadros ficam em memória até close(). No primeiro quadro a memória
+    total (n_frames quadros RGB) é estimada e, acima de PILLOW_WEBP_MAX_BYTES,
+    a animação é recusada antes de renderizar o resto.
+    """
+
+    def __init__(self, path: Path, fps: int, n_frames: int):
+        self.path = path
+        self.duration = int(1000 / max(1, fps))
+        self.n_frames = n_frames
+        self.frames = []
+
+    def write(self, rgb):
+        if not self.frames:
+            need = self.n_frames * rgb.nbytes
+            if need > PILLOW_WEBP_MAX_BYTES:
+                raise RuntimeError(
+                    f"WebP sem ffmpeg manteria {self.n_frames} quadros em memória "
+                    f"(~{need / 2**20:.0f} MiB, limite {PILLOW_WEBP_MAX_BYTES / 2**20:.0f} MiB); "
+                    f"instale o ffmpeg ou use fmt='gif'."
+                )
+        self.frames.append(Image.fromarray(rgb))
+
+    def close(self):
+        if self.frames:
+            self.frames[0].save(
+                self.path, format="WEBP", save_all=True, append_images=self.frames[1:],
+                duration=self.duration, loop=0
+            )
+        self.frames = []
+
+
+class _FfmpegWriter:
+    """Envia quadros RGB crus para um processo ffmpeg local via stdin."""
+
+    CODEC_ARGS = {
+        "webp": ["-c:v", "libwebp", "-lossless", "0", "-loop", "0"],
+        "mp4":  ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"],
     }
 
+    def __init__(self, path: Path, fps: int, fmt: str):
+        self.path = path
+        self.fps = max(1, fps)
+        self.fmt = fmt
+        self.proc = None
+
+    def write(self, rgb):
+        if self.proc is None:
+            h, w, _ = rgb.shape
+            cmd = [
+                shutil.which("ffmpeg"), "-y", "-loglevel", "error",
+                "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-r", str(self.fps),
+                "-i", "-", *self.CODEC_ARGS[self.fmt], str(self.path),
+            ]
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        self.proc.stdin.write(rgb.tobytes())
+
+    def close(self):
+        if self.proc is None:
+            return
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg falhou ao gerar {self.path}")
+
+
+def _open_writer(path: Path, fmt: str, fps: int, n_frames: int):
+    if fmt == "gif":
+        return _GifWriter(path, fps)
+    if shutil.which("ffmpeg"):
+        return _FfmpegWriter(path, fps, fmt)
+    if fmt == "webp":
+        return _PillowWebpWriter(path, fps, n_frames)
+    raise RuntimeError(f"Formato '{fmt}' requer o 'ffmpeg' disponível no PATH.")
+
+
+# ==============================
+# API
+# ==============================
+
+def save_routes_animations(
+    installed, r_mobile, mob_names, q_sink, q_fixed, R_comm, region,
+    x_val, E_t, T, F, out_dir_path: Path, *, jump_factor: float = 5.0, fps: int = 3,
+    fmt: str = "gif", variants=("routes", "routes2"), workers: int | None = None,
+    chunk_size: int = 8, frames_dir: Path | None = None, dpi: int = 100
+) -> dict[str, Path]:
+    """
+    Gera as animações das rotas em uma única passada sobre t.
+    - variants: subconjunto de VARIANTS; cada uma vira <variante>.<fmt> em out_dir_path.
+    - fmt: 'gif' (Pillow, incremental), 'webp' ou 'mp4' (ffmpeg local, quando presente;
+      sem ffmpeg o WebP vem do Pillow, limitado a PILLOW_WEBP_MAX_BYTES de quadros).
+    - workers: processos de renderização (None = os.cpu_count(); 1 = serial).
+    - chunk_size: quantidade de slots renderizados por tarefa do pool.
+    - frames_dir: se informado, grava também frames_dir/<variante>/frame_XXX.png.
+    Retorna dict variante -> caminho do arquivo gerado.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt} (esperado um de {FORMATS})")
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        raise ValueError(f"Variantes desconhecidas: {sorted(unknown)}")
+
+    out_dir_path = Path(out_dir_path)
+    out_dir_path.mkdir(parents=True, exist_ok=True)
+
+    if frames_dir is not None:
+        frames_dir = Path(frames_dir)
+        if os.path.isdir(frames_dir):
+            shutil.rmtree(frames_dir)
+        for variant in variants:
+            os.makedirs(frames_dir / variant, exist_ok=True)
+
+    # Posições dos móveis por slot: (T, M, 2)
+    mob_pos = np.array(
+        [[r_mobile(name, t) for name in mob_names] for t in range(1, T + 1)], dtype=float
+    ).reshape(T, len(mob_names), 2)
+    mob_index = {name: k for k, name in enumerate(mob_names)}
+
     def _pos_node(n, t):
         if n[0] == "sink":
             return q_sink
         if n[0] == "j":
             return q_fixed[n]
         if n[0] == "m":
-            return r_mobile(n[1], t)
+            return mob_pos[t - 1, mob_index[n[1]]]
         raise ValueError("nó desconhecido")
 
-    def _draw_frame(t):
-        fig = plt.figure(figsize=(10, 8))
-        ax = plt.gca()
-
-        # Fixos não instalados (cinza)
-        installed_set = set(installed)
-        for j in F:
-            if j not in installed_set:
-                q = q_fixed[j]
-                ax.scatter([q[0]], [q[1]], marker='s', s=S_FIXED0, c=COLOR_FIXED0, alpha=0.9)
-
-        # Fixos instalados (verde) + (se quiser, mantenha o círculo de alcance)
-        for j in installed:
-            q = q_fixed[j]
-            ax.scatter([q[0]], [q[1]], marker='s', s=S_FIXED1, c=COLOR_FIXED1)
-            ax.add_patch(Circle((q[0], q[1]), R_comm, fill=False, linewidth=1, ls='--', edgecolor=COLOR_FIXED1, alpha=0.6))
-
-        # Sink (estrela azul)
-        ax.scatter([q_sink[0]], [q_sink[1]], marker='*', s=S_SINK, c=COLOR_SINK)
-
-        # Trajetórias (pretas, tracejadas e leves para contexto)
-        for name in mob_names:
-            traj = traj_cache[name]
-            ax.plot(traj[:, 0], traj[:, 1], linestyle=':', linewidth=2, alpha=0.5, c=COLOR_MOBILE)
-
-        # Móveis (pretos)
-        for name in mob_names:
-            pm = r_mobile(name, t)
-            ax.scatter([pm[0]], [pm[1]], marker='o', s=S_MOBILE, c=COLOR_MOBILE)
-
-        # Links ativos (vermelho sólido)
-        flows = {
-            (i, j): x_val.get((i, j, t), 0.0)
+    # Segmentos dos links ativos por slot
+    segments = []
+    for t in range(1, T + 1):
+        segs = [
+            (_pos_node(i, t), _pos_node(j, t))
             for (i, j) in E_t.get(t, [])
             if x_val.get((i, j, t), 0.0) > FLOW_EPS
-        }
-        for (i, j), val in flows.items():
-            pi, pj = _pos_node(i, t), _pos_node(j, t)
-            ax.plot([pi[0], pj[0]], [pi[1], pj[1]], linewidth=2.2, linestyle='-', c=COLOR_LINK, alpha=0.95)
-
-        ax.set_title(f"Rotas de comunicação (t = {t})")
-        ax.axis('equal')
-        ax.grid(True)
-        if region and len(region) == 4:
-            ax.set_xlim(region[0], region[2])
-            ax.set_ylim(region[1], region[3])
-        plt.tight_layout()
-
-        buf = io.BytesIO()
-        fig.canvas.print_png(buf)
-        plt.close(fig)
-        buf.seek(0)
-        img = Image.open(buf).convert("P")
-        return img
-
-    frames = []
-    for t in range(1, T + 1):
-        img = _draw_frame(t)
-        frame_path = os.path.join(frames_dir, f"frame_{t:03d}.png")
-        img.convert("RGB").save(frame_path, format="PNG")
-        frames.append(img)
-
-    gif_path = out_dir_path / "routes.gif"
-    if frames:
-        frames[0].save(
-            gif_path,
-            save_all=True,
-            append_images=frames[1:],
-            duration=int(1000 / max(1, fps)),
-            loop=0
-        )
-    return gif_path
-
-
-        
-def save_routes2_gif(
-    installed, r_mobile, mob_names, q_sink, q_fixed, R_comm, region,
-    x_val, E_t, T, F, out_dir_path: Path, *, jump_factor: float = 5.0, fps: int = 3
-):
-    # Paleta / estilo
-    COLOR_SINK   = "blue"
-    COLOR_FIXED0 = "gray"    # não instalado
-    COLOR_FIXED1 = "green"   # instalado
-    COLOR_MOBILE = "black"
-    COLOR_LINK   = "red"
-
-    S_SINK   = 260
-    S_FIXED0 = 40
-    S_FIXED1 = 120
-    S_MOBILE = 80
-
-    # Pasta de frames
-    frames_dir = out_dir_path / "frames_gif"
-    if os.path.isdir(frames_dir):
-        shutil.rmtree(frames_dir)
-    os.makedirs(frames_dir, exist_ok=True)
-
-    FLOW_EPS = 1e-6
-
-    # Trajetórias com quebras
-    traj_cache = {
-        name: _traj_with_breaks(r_mobile, name, T, close=False, jump_factor=jump_factor)
-        for name in mob_names
-    }
+        ]
+        segments.append(np.array(segs, dtype=float).reshape(-1, 2, 2))
 
     installed_set = set(installed)
+    static = {
+        "cand_pos": np.array([q_fixed[j] for j in F], dtype=float).reshape(-1, 2),
+        "installed_mask": np.array([j in installed_set for j in F], dtype=bool),
+        "q_sink": np.asarray(q_sink, dtype=float),
+        "R_comm": float(R_comm),
+        "region": region,
+        "trajs": [_break_jumps(mob_pos[:, k], jump_factor) for k in range(len(mob_names))],
+        "variants": tuple(variants),
+        "frames_dir": frames_dir,
+        "dpi": dpi,
+    }
 
-    def _pos_node(n, t):
-        if n[0] == "sink":
-            return q_sink
-        if n[0] == "j":
-            return q_fixed[n]
-        if n[0] == "m":
-            return r_mobile(n[1], t)
-        raise ValueError("nó desconhecido")
+    paths = {variant: out_dir_path / f"{variant}.{fmt}" for variant in variants}
+    writers = {variant: _open_writer(path, fmt, fps, T) for variant, path in paths.items()}
+    if workers is None:
+        workers = os.cpu_count() or 1
+    try:
+        for frames in _iter_frames(static, mob_pos, segments, T, workers, max(1, chunk_size)):
+            for variant, rgb in frames.items():
+                writers[variant].write(rgb)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return paths
+
+
+def save_routes_gif(
+    installed, r_mobile, mob_names, q_sink, q_fixed, R_comm, region,
+    x_val, E_t, T, F, out_dir_path: Path, *, jump_factor: float = 5.0, fps: int = 3,
+    workers: int | None = None, frames_dir: Path | None = None
+):
+    """routes.gif: links ativos e círculos de alcance nos fixos instalados."""
+    return save_routes_animations(
+        installed, r_mobile, mob_names, q_sink, q_fixed, R_comm, region,
+        x_val, E_t, T, F, out_dir_path, jump_factor=jump_factor, fps=fps,
+        variants=("routes",), workers=workers, frames_dir=frames_dir
+    )["routes"]
 
-    def _draw_frame(t):
-        fig = plt.figure(figsize=(10, 8))
-        ax = plt.gca()
-
-        # Fixos não instalados (cinza)
-        for j in F:
-            if j not in installed_set:
-                q = q_fixed[j]
-                ax.scatter([q[0]], [q[1]], marker='s', s=S_FIXED0, c=COLOR_FIXED0, alpha=0.9)
-
-        # Fixos instalados (verde)
-        for j in installed:
-            q = q_fixed[j]
-            ax.scatter([q[0]], [q[1]], marker='s', s=S_FIXED1, c=COLOR_FIXED1)
-
-        # Sink (estrela azul)
-        ax.scatter([q_sink[0]], [q_sink[1]], marker='*', s=S_SINK, c=COLOR_SINK)
-
-        # Trajetórias dos móveis (pretas tracejadas)
-        for name in mob_names:
-            traj = traj_cache[name]
-            ax.plot(traj[:, 0], traj[:, 1], linestyle=':', linewidth=2, alpha=0.6, c=COLOR_MOBILE)
-
-        # Posição atual de cada móvel (pretos) + círculo de alcance (opcional, preto tracejado)
-        for name in mob_names:
-            pm = r_mobile(name, t)
-            ax.scatter([pm[0]], [pm[1]], marker='o', s=S_MOBILE, c=COLOR_MOBILE)
-            ax.add_patch(Circle((pm[0], pm[1]), R_comm, fill=False, linewidth=1, ls='--', edgecolor=COLOR_MOBILE, alpha=0.6))
-
-        # Links ativos (vermelho sólido, sem distinção)
-        flows = {
-            (i, j): x_val.get((i, j, t), 0.0)
-            for (i, j) in E_t.get(t, [])
-            if x_val.get((i, j, t), 0.0) > FLOW_EPS
-        }
-        for (i, j), val in flows.items():
-            pi, pj = _pos_node(i, t), _pos_node(j, t)
-            ax.plot([pi[0], pj[0]], [pi[1], pj[1]], linewidth=2.4, linestyle='-', c=COLOR_LINK, alpha=0.95)
-
-        ax.set_title(f"Rotas de comunicação (t = {t})")
-        ax.axis('equal')
-        ax.grid(True)
-        if region and len(region) == 4:
-            ax.set_xlim(region[0], region[2])
-            ax.set_ylim(region[1], region[3])
-        plt.tight_layout()
-
-        buf = io.BytesIO()
-        fig.canvas.print_png(buf)
-        plt.close(fig)
-        buf.seek(0)
-        img = Image.open(buf).convert("P")
-        return img
-
-    frames = []
-    for t in range(1, T + 1):
-        img = _draw_frame(t)
-        frame_path = os.path.join(frames_dir, f"frame_{t:03d}.png")
-        img.convert("RGB").save(frame_path, format="PNG")
-        frames.append(img)
-
-    gif_path = out_dir_path / "routes2.gif"
-    if frames:
-        frames[0].save(
-            gif_path,
-            save_all=True,
-            append_images=frames[1:],
-            duration=int(1000 / max(1, fps)),
-            loop=0
-        )
-    return gif_path
 
+def save_routes2_gif(
+    installed, r_mobile, mob_names, q_sink, q_fixed, R_comm, region,
+    x_val, E_t, T, F, out_dir_path: Path, *, jump_factor: float = 5.0, fps: int = 3,
+    workers: int | None = None, frames_dir: Path | None = None
+):
+    """routes2.gif: links ativos e círculos de alcance nos móveis."""
+    return save_routes_animations(
+        installed, r_mobile, mob_names, q_sink, q_fixed, R_comm, region,
+        x_val, E_t, T, F, out_dir_path, jump_factor=jump_factor, fps=fps,
+        variants=("routes2",), workers=workers, frames_dir=frames_dir
+    )["routes2"]
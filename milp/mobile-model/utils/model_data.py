@@ -0,0 +1,126 @@
+# model_data.py
+import numpy as np
+
+# Tipos de nó no registro
+SINK, FIXED, MOBILE = "sink", "j", "m"
+
+
+def build_node_registry(fixed_list, mobile_list) -> dict:
+    """
+    Registro de nós com ids inteiros densos, na ordem usada pelo modelo:
+        0                -> sink ('root' ou, na falta dele, o primeiro fixo)
+        1 .. nJ          -> candidatos fixos (ordem do JSON)
+        nJ+1 .. nJ+nM    -> móveis
+    Os nomes só são usados na fronteira de E/S (cromossomo, JSON de saída, plots).
+    Retorna dict com:
+        kind, name  -> arrays (N,) com o tipo ('sink'/'j'/'m') e o nome de cada nó
+        cand        -> ids dos candidatos fixos; mob -> ids dos móveis
+        fixed_pos   -> (1 + nJ, 2) posições do sink e dos candidatos
+    """
+    sink_name = None  # nome do sink
+    for fm in fixed_list:
+        if fm.get("name", "").lower() == "root":
+            sink_name = fm["name"]
+            break
+    if sink_name is None and fixed_list:
+        sink_name = fixed_list[0]["name"]
+
+    p_sink = None
+    cand_names, cand_pos = [], []
+    for fm in fixed_list:
+        name = str(fm["name"])
+        pos = np.array(fm["position"], dtype=float)
+        if name == sink_name:
+            p_sink = pos
+        else:
+            cand_names.append(name)
+            cand_pos.append(pos)
+
+    if p_sink is None:
+        raise ValueError("Não foi possível determinar a posição do sink.")
+
+    mob_names = [str(m["name"]) for m in mobile_list]
+    nJ, nM = len(cand_names), len(mob_names)
+
+    return {
+        "kind": np.array([SINK] + [FIXED] * nJ + [MOBILE] * nM, dtype=str),
+        "name": np.array([str(sink_name)] + cand_names + mob_names, dtype=str),
+        "cand": np.arange(1, 1 + nJ, dtype=np.int32),
+        "mob": np.arange(1 + nJ, 1 + nJ + nM, dtype=np.int32),
+        "fixed_pos": np.vstack([p_sink] + cand_pos).reshape(-1, 2),
+    }
+
+
+def node_positions(registry: dict, r_mobile_by_name: dict, T: int) -> np.ndarray:
+    """Posições p_i(t) de todos os nós: array (T, N, 2), com t=1..T na linha t-1."""
+    fixed_pos = registry["fixed_pos"]
+    mob_names = registry["name"][registry["mob"]].tolist()
+    pos = np.empty((T, len(fixed_pos) + len(mob_names), 2), dtype=float)
+    pos[:, :len(fixed_pos)] = fixed_pos
+    for k, name in enumerate(mob_names):
+        r_fn = r_mobile_by_name[name]
+        pos[:, len(fixed_pos) + k] = [r_fn(t) for t in range(1, T + 1)]
+    return pos
+
+
+def build_link_geometry(pos: np.ndarray, R_comm: float, R_interf: float) -> dict:
+    """
+    Arestas candidatas de E_t (0 < d <= R_comm) em struct-of-arrays, na ordem
+    (t, i, j) crescente, com:
+        src, dst (int32), t (int32, 1..T), d (distância) e cost = e_ij(t):
+            d^2,               se 0 < d <= R_comm
+            (R_interf - d)^2,  se R_comm < d <= R_interf
+            0,                 caso contrário.
+    Independe de C0/kdecay/B, portanto é calculada uma única vez por cenário.
+    """
+    src, dst, ts, dist = [], [], [], []
+    for t in range(1, len(pos) + 1):
+        p = pos[t - 1]
+        diff = p[:, None, :] - p[None, :, :]
+        # produtos escalares empilhados: mesmo arredondamento de np.linalg.norm(pi - pj)
+        d = np.sqrt(np.matmul(diff[..., None, :], diff[..., :, None])[..., 0, 0])
+        i, j = np.nonzero((d > 0.0) & (d <= R_comm))
+        src.append(i)
+        dst.append(j)
+        ts.append(np.full(len(i), t))
+        dist.append(d[i, j])
+
+    d = np.concatenate(dist) if dist else np.empty(0)
+    cost = np.where(
+        (d > 0.0) & (d <= R_comm), d ** 2,
+        np.where((d > R_comm) & (d <= R_interf), (R_interf - d) ** 2, 0.0)
+    )
+    return {
+        "src": np.concatenate(src).astype(np.int32) if src else np.empty(0, np.int32),
+        "dst": np.concatenate(dst).astype(np.int32) if dst else np.empty(0, np.int32),
+        "t": np.concatenate(ts).astype(np.int32) if ts else np.empty(0, np.int32),
+        "d": d,
+        "cost": cost,
+    }
+
+
+def build_edges(geometry: dict, C0: float, kdecay: float) -> dict:
+    """
+    Arestas de E_t para (C0, kdecay): mantém as de capacidade positiva,
+    C_ij(t) = max{0, C0 * (1 - kdecay * d)^2}. Retorna src, dst, t, cap, cost.
+    """
+    cap = np.maximum(0.0, C0 * (1.0 - kdecay * geometry["d"]) ** 2)
+    keep = cap > 0.0
+    return {
+        "src": geometry["src"][keep],
+        "dst": geometry["dst"][keep],
+        "t": geometry["t"][keep],
+        "cap": cap[keep],
+        "cost": geometry["cost"][keep],
+    }
+
+
+def group_edges(keys: np.ndarray, n_groups: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Agrupa ids de arestas por chave inteira (p.ex. t * N + nó), preservando a
+    ordem original dentro de cada grupo. Retorna (order, bounds): as arestas do
+    grupo k são order[bounds[k]:bounds[k + 1]].
+    """
+    order = np.argsort(keys, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=n_groups))])
+    return order, bounds
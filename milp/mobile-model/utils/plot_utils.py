@@ -1,11 +1,25 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
+from matplotlib.collections import EllipseCollection, LineCollection
 
 # ======================
 # Helper: trajetórias com quebras
 # ======================
 
+def _break_jumps(pts, jump_factor=5.0):
+    """
+    Insere NaNs em uma trajetória (N,2) onde houver saltos grandes,
+    quebrando a linha: quebra quando passo > jump_factor * mediana.
+    """
+    if len(pts) < 2:
+        return pts
+    dists = np.linalg.norm(np.diff(pts, axis=0), axis=1)
+    med = np.median(dists) if np.any(dists > 0) else 0.0
+    thr = max(1e-9, med * jump_factor)  # limiar robusto
+    jumps = np.flatnonzero(dists > thr) + 1
+    return np.insert(pts, jumps, np.nan, axis=0)
+
+
 def _traj_with_breaks(r_mobile, name, T, close=False, jump_factor=5.0):
     """
     Gera uma trajetória shape (N,2) com linhas 'quebradas' (NaNs) em saltos grandes.
@@ -17,22 +31,53 @@ def _traj_with_breaks(r_mobile, name, T, close=False, jump_factor=5.0):
     # Opcionalmente fechar (em geral, NÃO faça para caminhos abertos)
     if close:
         pts = np.vstack([pts, pts[0]])
+    return _break_jumps(pts, jump_factor)
 
-    # Distâncias entre pontos consecutivos
-    if len(pts) >= 2:
-        diffs = np.diff(pts, axis=0)
-        dists = np.linalg.norm(diffs, axis=1)
-        med = np.median(dists) if np.any(dists > 0) else 0.0
-        thr = max(1e-9, med * jump_factor)  # limiar robusto
-
-        # Monta com NaNs onde houver salto
-        rows = [pts[0]]
-        for k in range(1, len(pts)):
-            if dists[k - 1] > thr:
-                rows.append([np.nan, np.nan])  # quebra a linha aqui
-            rows.append(pts[k])
-        pts = np.array(rows, dtype=float)
-    return pts
+
+def _all_trajs_with_breaks(r_mobile, mob_names, T, jump_factor=5.0):
+    """
+    Concatena as trajetórias de todos os móveis em um único array (N,2),
+    separadas por NaN, para desenhar tudo com uma só linha/scatter.
+    """
+    nan_row = np.full((1, 2), np.nan)
+    parts = []
+    for name in mob_names:
+        parts.append(_traj_with_breaks(r_mobile, name, T, close=False, jump_factor=jump_factor))
+        parts.append(nan_row)
+    return np.vstack(parts) if parts else np.empty((0, 2))
+
+# ======================
+# Helper: artistas em lote
+# ======================
+
+def _as_points(keys, q_fixed):
+    """Posições (N,2) dos nós em 'keys' segundo o dicionário q_fixed."""
+    return np.array([q_fixed[k] for k in keys], dtype=float).reshape(-1, 2)
+
+
+def _range_circles(ax, centers, radius, **kwargs):
+    """Círculos de raio 'radius' (em unidades de dados) em uma única EllipseCollection."""
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    diam = np.full(len(centers), 2.0 * radius)
+    coll = EllipseCollection(
+        diam, diam, np.zeros(len(centers)), units='xy',
+        offsets=centers, offset_transform=ax.transData,
+        facecolors='none', linewidths=1, linestyles='--', **kwargs
+    )
+    ax.add_collection(coll)
+    return coll
+
+
+def _pairwise_edges(points, radius, tol=1e-9):
+    """
+    Pares (a,b), a < b, de pontos com ||p_a - p_b|| <= radius + tol,
+    calculados com uma única matriz de distâncias.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    diff = points[:, None, :] - points[None, :, :]
+    dist = np.hypot(diff[..., 0], diff[..., 1])
+    a, b = np.nonzero(np.triu(dist <= radius + tol, k=1))
+    return np.stack([a, b], axis=1)
 
 # ======================
 # Paleta / tamanhos (padrão visual)
@@ -49,30 +94,31 @@ S_FIXED0 = 40
 S_FIXED1 = 120
 S_MOBILE = 18  # pontos da trajetória
 
+DPI = 150
+THUMB_DPI = 50  # miniaturas (use dpi=THUMB_DPI)
+
 # ================
 # FIGURA 1
 # ================
 
-def plot_candidates_and_paths(F, q_fixed, q_sink, R_comm, mob_names, r_mobile, 
-                              T, region, out_path="./pic1.jpg"):
+def plot_candidates_and_paths(F, q_fixed, q_sink, R_comm, mob_names, r_mobile,
+                              T, region, out_path="./pic1.jpg", dpi=DPI):
     plt.figure(figsize=(10, 7))
     ax = plt.gca()
 
     # candidatos + raios
-    for j in F:
-        q = q_fixed[j]
-        ax.add_patch(Circle((q[0], q[1]), R_comm, fill=False, linewidth=1, ls='--', edgecolor="gray"))
-        ax.scatter([q[0]], [q[1]], marker='s', s=S_FIXED0, c=COLOR_CANDIDATE)
+    cand = _as_points(F, q_fixed)
+    _range_circles(ax, cand, R_comm, edgecolors="gray")
+    ax.scatter(cand[:, 0], cand[:, 1], marker='s', s=S_FIXED0, c=COLOR_CANDIDATE)
 
     # sink + raio
     ax.scatter([q_sink[0]], [q_sink[1]], marker='*', s=S_SINK, c=COLOR_SINK, label="sink")
-    ax.add_patch(Circle((q_sink[0], q_sink[1]), R_comm, fill=False, linewidth=1, ls='--', edgecolor=COLOR_SINK, alpha=0.6))
+    _range_circles(ax, [q_sink], R_comm, edgecolors=COLOR_SINK, alpha=0.6)
 
     # trajetórias (NÃO fecha; quebra saltos com NaN)
-    for name in mob_names:
-        traj = _traj_with_breaks(r_mobile, name, T, close=False, jump_factor=5.0)
-        ax.plot(traj[:, 0], traj[:, 1], linestyle='--', linewidth=2, alpha=0.6, c=COLOR_MOBILE, label=None)
-        ax.scatter(traj[:, 0], traj[:, 1], marker='o', s=S_MOBILE, c=COLOR_MOBILE, alpha=0.7, label=None)
+    traj = _all_trajs_with_breaks(r_mobile, mob_names, T, jump_factor=5.0)
+    ax.plot(traj[:, 0], traj[:, 1], linestyle='--', linewidth=2, alpha=0.6, c=COLOR_MOBILE, label=None)
+    ax.scatter(traj[:, 0], traj[:, 1], marker='o', s=S_MOBILE, c=COLOR_MOBILE, alpha=0.7, label=None)
 
     ax.set_title("Candidatos, sink e trajetórias (raios de comunicação)")
     ax.axis('equal')
@@ -82,7 +128,7 @@ def plot_candidates_and_paths(F, q_fixed, q_sink, R_comm, mob_names, r_mobile,
         ax.set_xlim(region[0], region[2])
         ax.set_ylim(region[1], region[3])
     plt.tight_layout()
-    plt.savefig(out_path, dpi=150)
+    plt.savefig(out_path, dpi=dpi)
     plt.close()
 
 # ================
@@ -90,35 +136,32 @@ def plot_candidates_and_paths(F, q_fixed, q_sink, R_comm, mob_names, r_mobile,
 # ================
 
 def plot_solution(F, installed, q_fixed, q_sink, R_comm, R_inter,
-                  mob_names, T, r_mobile, region, out_path="./pic2.png"):
+                  mob_names, T, r_mobile, region, out_path="./pic2.png", dpi=DPI):
     plt.figure(figsize=(10, 7))
     ax = plt.gca()
 
     # todos candidatos
     installed_set = set(installed)
-
-    for j in F:
-        if j not in installed_set:
-            q = q_fixed[j]
-            ax.scatter([q[0]], [q[1]], marker='s', s=S_FIXED0, c=COLOR_FIXED0, alpha=0.9)
+    idle = _as_points([j for j in F if j not in installed_set], q_fixed)
+    ax.scatter(idle[:, 0], idle[:, 1], marker='s', s=S_FIXED0, c=COLOR_FIXED0, alpha=0.9)
 
     # instalados
-    for j in installed:
-        q = q_fixed[j]
+    inst = _as_points(installed, q_fixed)
+    # um ponto por instalado: cada um mantém a sua entrada de legenda
+    for j, q in zip(installed, inst):
         ax.scatter([q[0]], [q[1]], marker='s', s=S_FIXED1, c=COLOR_FIXED1, label=f"instalado {j[1]}")
-        ax.add_patch(Circle((q[0], q[1]), R_comm, fill=False, linewidth=1, ls='--', edgecolor=COLOR_FIXED1, alpha=0.6))
-        ax.add_patch(Circle((q[0], q[1]), R_inter, fill=False, linewidth=1, ls='--', edgecolor="orange", alpha=0.6))
+    _range_circles(ax, inst, R_comm, edgecolors=COLOR_FIXED1, alpha=0.6)
+    _range_circles(ax, inst, R_inter, edgecolors="orange", alpha=0.6)
 
     # sink
     ax.scatter([q_sink[0]], [q_sink[1]], marker='*', s=S_SINK, c=COLOR_SINK, label="sink")
-    ax.add_patch(Circle((q_sink[0], q_sink[1]), R_comm, fill=False, linewidth=1, ls='--', edgecolor=COLOR_SINK, alpha=0.6))
-    ax.add_patch(Circle((q_sink[0], q_sink[1]), R_inter, fill=False, linewidth=1, ls='--', edgecolor="orange", alpha=0.6))
+    _range_circles(ax, [q_sink], R_comm, edgecolors=COLOR_SINK, alpha=0.6)
+    _range_circles(ax, [q_sink], R_inter, edgecolors="orange", alpha=0.6)
 
     # trajetórias (contexto): não fechar, com quebras
-    for name in mob_names:
-        traj = _traj_with_breaks(r_mobile, name, T, close=False, jump_factor=5.0)
-        ax.plot(traj[:, 0], traj[:, 1], linestyle='--', linewidth=2, alpha=0.6, c=COLOR_MOBILE)
-        ax.scatter(traj[:, 0], traj[:, 1], marker='o', s=S_MOBILE, c=COLOR_MOBILE, alpha=0.7)
+    traj = _all_trajs_with_breaks(r_mobile, mob_names, T, jump_factor=5.0)
+    ax.plot(traj[:, 0], traj[:, 1], linestyle='--', linewidth=2, alpha=0.6, c=COLOR_MOBILE)
+    ax.scatter(traj[:, 0], traj[:, 1], marker='o', s=S_MOBILE, c=COLOR_MOBILE, alpha=0.7)
 
     ax.set_title(f"Solução (raios de comunicação instalados)")
     ax.axis('equal')
@@ -128,46 +171,35 @@ def plot_solution(F, installed, q_fixed, q_sink, R_comm, R_inter,
         ax.set_xlim(region[0], region[2])
         ax.set_ylim(region[1], region[3])
     plt.tight_layout()
-    plt.savefig(out_path, dpi=150)
+    plt.savefig(out_path, dpi=dpi)
     plt.close()
 
 
-def plot_installed_graph(installed, q_fixed, q_sink, R_comm, region, out_path="./pic_installed_graph.png"):
+def plot_installed_graph(installed, q_fixed, q_sink, R_comm, region,
+                         out_path="./pic_installed_graph.png", dpi=DPI):
     """
     Plota apenas o grafo formado pelos motes FIXOS instalados.
     - Vértices: instalados (COLOR_FIXED1) e sink (COLOR_SINK).
     - Arestas: entre instalados (e do sink para instalados) quando ||u - v|| <= R_comm.
     - Sem móveis e sem candidatos não instalados.
+    - dpi: resolução do PNG (THUMB_DPI para miniaturas).
     """
     plt.figure(figsize=(10, 7))
     ax = plt.gca()
 
+    # sink na posição 0, seguido dos instalados
+    pts = np.vstack([np.asarray(q_sink, dtype=float).reshape(1, 2), _as_points(installed, q_fixed)])
+
+    # arestas (vermelhas contínuas): entre instalados e sink ↔ instalados
+    edges = _pairwise_edges(pts, R_comm)
+    ax.add_collection(LineCollection(pts[edges], linewidths=2.0, linestyles='-', colors="red"))
+
     # nós instalados (vermelho, conforme seu padrão atual)
-    for j in installed:
-        q = q_fixed[j]
-        ax.scatter([q[0]], [q[1]], marker='s', s=S_FIXED1, c=COLOR_FIXED1)
+    ax.scatter(pts[1:, 0], pts[1:, 1], marker='s', s=S_FIXED1, c=COLOR_FIXED1)
 
     # sink (estrela azul)
     ax.scatter([q_sink[0]], [q_sink[1]], marker='*', s=S_SINK, c=COLOR_SINK)
 
-    # arestas (vermelhas contínuas) entre instalados
-    def _dist(p, q):
-        return float(np.hypot(p[0]-q[0], p[1]-q[1]))
-
-    # entre instalados
-    for idx in range(len(installed)):
-        for jdx in range(idx + 1, len(installed)):
-            a = installed[idx]; b = installed[jdx]
-            pa, pb = q_fixed[a], q_fixed[b]
-            if _dist(pa, pb) <= R_comm + 1e-9:
-                ax.plot([pa[0], pb[0]], [pa[1], pb[1]], linewidth=2.0, linestyle='-', c="red")
-
-    # sink ↔ instalados
-    for j in installed:
-        p = q_fixed[j]
-        if _dist(q_sink, p) <= R_comm + 1e-9:
-            ax.plot([q_sink[0], p[0]], [q_sink[1], p[1]], linewidth=2.0, linestyle='-', c="red")
-
     ax.set_title("Grafo dos fixos instalados (arestas ≤ R_comm)")
     ax.axis('equal')
     ax.grid(True)
@@ -175,5 +207,5 @@ def plot_installed_graph(installed, q_fixed, q_sink, R_comm, region, out_path=".
         ax.set_xlim(region[0], region[2])
         ax.set_ylim(region[1], region[3])
     plt.tight_layout()
-    plt.savefig(out_path, dpi=150)
+    plt.savefig(out_path, dpi=dpi)
     plt.close()
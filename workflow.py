@@ -0,0 +1,414 @@
+"""
+Incremental build of the end-to-end experiment:
+
+    designs  milp/mobile-model/runner.py      input.json -> output-<chrom>.json
+    publish  designs -> batch_runner/input
+    simulate batch_runner/batch_runner.py     .csc/positions.dat -> logs -> objectives
+    collect  batch_runner results -> data/simulation/milp-mobile
+    fronts   data/simulation/milp-mobile/pareto_analysis.py
+    global   data/pareto_global.py
+
+Each stage declares the files it reads (its scripts and code included) and is
+keyed by the sha256 of their contents. A stage runs again only when that key
+differs from the one of its last successful run, or when one of its outputs is
+missing; upstream stages run first, and a downstream stage whose inputs came
+out byte-identical is skipped. Changing radiusOfInter in input.json (or
+w_install in runner.py) re-solves the sweep but re-simulates only the designs
+that actually changed, since batch_runner keys every job by content as well.
+Changing only simulation_template.xml starts at 'simulate'.
+
+    python workflow.py [stage ...] [--dry-run] [--force stage,...] [--prune] [--list]
+
+milp/mobile-model/output, batch_runner/input and the archive under
+data/simulation/milp-mobile are committed data: 'designs', 'publish' and
+'collect' only add and update files there ('designs' once the whole sweep
+succeeded). With --prune they also remove the designs that are not in the
+current sweep.
+
+Firmware rebuilt on the Cooja workers is not visible from here; batch_runner
+already accounts for it per job, so use --force simulate in that case.
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# Keys of the last successful run of each stage, plus a stat cache of file digests
+STATE_PATH = ROOT / ".workflow.json"
+
+MILP_DIR = ROOT / "milp" / "mobile-model"
+RUNNER_DIR = ROOT / "batch_runner"
+DATA_DIR = ROOT / "data"
+ARCHIVE_DIR = DATA_DIR / "simulation" / "milp-mobile"
+
+# Artifacts of one MILP sweep in milp/mobile-model/output, and the scratch
+# directory (relative to MILP_DIR) they are solved into
+DESIGN_FILES = ("output-*.json", "output-*.npz", "pic_installed_graph_*.png")
+SCRATCH_DIR = "output.partial"
+
+# Per-design artifacts copied to the archive read by the Pareto scripts
+RESULT_FILES = ("objectives.json", "replicates.json", "metrics.json", "sim.parquet", "sim.csv")
+
+# Set by --prune: 'designs', 'publish' and 'collect' delete designs left over from other sweeps
+PRUNE = False
+
+
+# ============================================================
+# Stages
+# ============================================================
+
+class Stage:
+    """
+    A step of the workflow. 'inputs' and 'outputs' are globs relative to ROOT;
+    'action' is a command run in 'cwd' or a callable. 'after' lists the
+    stages that produce the inputs.
+    """
+
+    def __init__(self, name: str, inputs, outputs, action, cwd: Path = ROOT, after=()):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.action = action
+        self.cwd = cwd
+        self.after = tuple(after)
+
+    def describe(self) -> str:
+        """Identity of the action itself, part of the stage key."""
+        if callable(self.action):
+            # __module__ is '__main__' or 'workflow' depending on how this file
+            # was loaded: identify the function by name and source instead
+            source = hashlib.sha256(inspect.getsource(self.action).encode("utf-8")).hexdigest()[:12]
+            return f"{self.action.__qualname__}:{source}"
+        # the interpreter path differs between machines and virtualenvs
+        return " ".join("python" if arg == PYTHON else arg for arg in self.action)
+
+    def run(self):
+        if callable(self.action):
+            self.action()
+        else:
+            subprocess.run(self.action, cwd=self.cwd, check=True)
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name})"
+
+
+def _same(src: Path | bytes, dst: Path) -> bool:
+    data = src if isinstance(src, bytes) else src.read_bytes()
+    return dst.exists() and dst.stat().st_size == len(data) and dst.read_bytes() == data
+
+
+def mirror(files: dict[Path, Path | bytes], names: set[str], *dest_dirs: Path):
+    """
+    Writes each destination from its source file (or generated contents) when
+    the contents differ. With
+    PRUNE, entries of 'dest_dirs' whose design is not in 'names' any more (a
+    previous sweep) are removed, as are stale files inside the design
+    directories updated now; otherwise they are only listed.
+    """
+    keep = set()
+    for dst, src in files.items():
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(src, bytes):
+            if not _same(src, dst):
+                dst.write_bytes(src)
+        elif not _same(src, dst):
+            shutil.copy2(src, dst)
+        keep.add(dst)
+        keep.update(dst.parents)
+    stale = []
+    for d in dest_dirs:
+        for path in d.glob("output-*"):
+            if path.is_dir():
+                if path.name not in names:
+                    stale.append(path)
+                elif path in keep:
+                    stale.extend(f for f in path.iterdir() if f.is_file() and f not in keep)
+            elif path.stem not in names:
+                stale.append(path)
+    discard(stale)
+
+
+def discard(stale: list[Path]):
+    """Removes entries left over from a previous sweep with PRUNE; otherwise only lists them."""
+    if stale and not PRUNE:
+        print(f"[KEEP] {len(stale)} entr(ies) not in the current sweep (remove with --prune), "
+              f"e.g. {stale[0].relative_to(ROOT)}")
+        return
+    for path in stale:
+        shutil.rmtree(path) if path.is_dir() else path.unlink()
+
+
+def solve_designs():
+    """
+    Runs the MILP sweep into a scratch directory and moves its artifacts into
+    milp/mobile-model/output only after the whole sweep succeeded, so a failed
+    solve (e.g. a solver size limit) leaves the committed designs untouched.
+    Designs of a previous sweep are removed only with --prune.
+    """
+    out_dir = MILP_DIR / "output"
+    scratch = MILP_DIR / SCRATCH_DIR
+    shutil.rmtree(scratch, ignore_errors=True)
+    subprocess.run([PYTHON, "runner.py", "--output-dir", SCRATCH_DIR], cwd=MILP_DIR, check=True)
+    out_dir.mkdir(exist_ok=True)
+    fresh = {p.name for p in scratch.iterdir()}
+    for path in scratch.iterdir():
+        os.replace(path, out_dir / path.name)
+    scratch.rmdir()
+    discard(sorted(p for pattern in DESIGN_FILES for p in out_dir.glob(pattern) if p.name not in fresh))
+
+
+def publish_designs():
+    """Copies the designs of the current sweep to batch_runner/input (only them, with --prune)."""
+    designs = sorted((MILP_DIR / "output").glob("output-*.json"))
+    mirror({RUNNER_DIR / "input" / p.name: p for p in designs}, {p.stem for p in designs}, RUNNER_DIR / "input")
+
+
+def collect_results():
+    """
+    Archives input, results and build files of every simulated design of the
+    current sweep; a design without results keeps whatever was archived.
+    The build files are the ones Cooja actually ran: the .csc with the job's
+    markers filled in, and positions.dat reassembled from the fixed part and
+    the shared mobility block ([CONFIG_DIR] in the .csc resolves to the
+    archived positions.dat next to it).
+    """
+    # batch_runner's lib/ is imported the way batch_runner.py itself does
+    sys.path.insert(0, str(RUNNER_DIR))
+    from lib.executors import job_csc
+    from lib.parse_json_pos_dat import FIXED_POSITIONS, MobilityCache, assemble_positions
+
+    mobility = MobilityCache(RUNNER_DIR / "tmp" / "mobility")
+    files, names = {}, set()
+    for json_file in sorted((RUNNER_DIR / "input").glob("output-*.json")):
+        name = json_file.stem
+        names.add(name)
+        out_dir = RUNNER_DIR / "output" / name
+        if not (out_dir / "objectives.json").exists():
+            continue  # failed simulation: batch_runner reports it
+        files[ARCHIVE_DIR / "input" / json_file.name] = json_file
+        for f in RESULT_FILES:
+            if (out_dir / f).exists():
+                files[ARCHIVE_DIR / "output" / name / f] = out_dir / f
+
+        build_dir, archive = RUNNER_DIR / "tmp" / name, ARCHIVE_DIR / "tmp" / name
+        if (build_dir / "simulation.csc").exists():  # replicated designs build per replicate
+            files[archive / "simulation.csc"] = job_csc(build_dir / "simulation.csc", name)
+        if (build_dir / FIXED_POSITIONS).exists():
+            with open(json_file, "r") as f:
+                elements = json.load(f)["simulationElements"]
+            block = mobility.get(elements["mobileMotes"])[0] if elements["mobileMotes"] else None
+            positions = assemble_positions(build_dir / FIXED_POSITIONS, block, len(elements["fixedMotes"]))
+            files[archive / "positions.dat"] = positions
+    mirror(files, names, *(ARCHIVE_DIR / sub for sub in ("input", "output", "tmp")))
+
+
+PYTHON = sys.executable
+
+STAGES = [
+    Stage(
+        "designs",
+        inputs=("milp/mobile-model/input.json", "milp/mobile-model/runner.py", "milp/mobile-model/utils/*.py"),
+        outputs=("milp/mobile-model/output/output-*.json",),
+        action=solve_designs,
+    ),
+    Stage(
+        "publish",
+        inputs=("milp/mobile-model/output/output-*.json",),
+        outputs=("batch_runner/input/output-*.json",),
+        action=publish_designs,
+        after=("designs",),
+    ),
+    Stage(
+        "simulate",
+        inputs=("batch_runner/input/*.json", "batch_runner/simulation_template.xml",
+                "batch_runner/batch_runner.py", "batch_runner/lib/*.py"),
+        outputs=("batch_runner/output/manifest.json",),
+        action=[PYTHON, "batch_runner.py"],
+        cwd=RUNNER_DIR,
+        after=("publish",),
+    ),
+    Stage(
+        "collect",
+        inputs=("batch_runner/input/output-*.json", "batch_runner/output/output-*/objectives.json",
+                "batch_runner/output/output-*/metrics.json", "batch_runner/output/output-*/replicates.json"),
+        outputs=("data/simulation/milp-mobile/output/*/objectives.json",),
+        action=collect_results,
+        after=("simulate",),
+    ),
+    Stage(
+        "fronts",
+        inputs=("data/simulation/milp-mobile/output/*/objectives.json",
+                "data/simulation/milp-mobile/pareto_analysis.py"),
+        outputs=("data/simulation/milp-mobile/pareto_milp_fronts.png",),
+        action=[PYTHON, "pareto_analysis.py"],
+        cwd=ARCHIVE_DIR,
+        after=("collect",),
+    ),
+    Stage(
+        "global",
+        inputs=("data/simulation/milp-mobile/output/*/objectives.json", "data/simlab/*.json",
+                "data/pareto_global.py"),
+        outputs=("data/pareto_fronts_global.png",),
+        action=[PYTHON, "pareto_global.py"],
+        cwd=DATA_DIR,
+        after=("collect",),
+    ),
+]
+
+
+# ============================================================
+# Content keys
+# ============================================================
+
+class State:
+    """Stage keys and file digests; a digest is reused while size and mtime match."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.stages: dict[str, dict] = {}
+        self.files: dict[str, list] = {}
+        if path.exists():
+            with open(path, "r") as f:
+                data = json.load(f)
+            self.stages = data.get("stages", {})
+            self.files = data.get("files", {})
+
+    def digest(self, path: Path) -> str:
+        rel = path.relative_to(ROOT).as_posix()
+        st = path.stat()
+        cached = self.files.get(rel)
+        if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.files[rel] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def inputs(self, stage: Stage) -> dict[str, str]:
+        paths = sorted({p for pattern in stage.inputs for p in ROOT.glob(pattern) if p.is_file()})
+        return {p.relative_to(ROOT).as_posix(): self.digest(p) for p in paths}
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"stages": self.stages, "files": self.files}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def stage_key(stage: Stage, inputs: dict[str, str]) -> str:
+    h = hashlib.sha256(stage.describe().encode("utf-8"))
+    for rel, digest in inputs.items():
+        h.update(f"\0{rel}\0{digest}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def stale_reason(stage: Stage, state: State, inputs: dict[str, str]) -> str | None:
+    """Why 'stage' must run, or None when it is up to date."""
+    last = state.stages.get(stage.name)
+    if last is None:
+        return "never built"
+    missing = [pattern for pattern in stage.outputs if next(ROOT.glob(pattern), None) is None]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    if last["key"] == stage_key(stage, inputs):
+        return None
+    if last.get("action") != stage.describe():
+        return "action changed"
+    old = last.get("inputs", {})
+    changed = sorted(
+        [f"+{p}" for p in inputs.keys() - old.keys()]
+        + [f"-{p}" for p in old.keys() - inputs.keys()]
+        + [p for p in inputs.keys() & old.keys() if inputs[p] != old[p]]
+    )
+    shown = ", ".join(changed[:3]) + (f" (+{len(changed) - 3} more)" if len(changed) > 3 else "")
+    return f"inputs changed: {shown}"
+
+
+# ============================================================
+# Build
+# ============================================================
+
+def select(targets: list[str]) -> list[Stage]:
+    """Stages needed for 'targets' (all by default), in declaration order."""
+    by_name = {s.name: s for s in STAGES}
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise SystemExit(f"unknown stage(s): {', '.join(unknown)} (stages: {', '.join(by_name)})")
+    needed = set()
+    pending = list(targets or by_name)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(by_name[name].after)
+    return [s for s in STAGES if s.name in needed]
+
+
+def build(targets: list[str], force=(), dry_run: bool = False) -> int:
+    state = State(STATE_PATH)
+    stale = set()
+    for stage in select(targets):
+        inputs = state.inputs(stage)
+        reason = "forced" if stage.name in force else stale_reason(stage, state, inputs)
+        if dry_run:
+            # a stale upstream stage may or may not change this one's inputs
+            upstream = [a for a in stage.after if a in stale]
+            if reason is None and upstream:
+                print(f"[MAYBE] {stage.name}: after {', '.join(upstream)}")
+                stale.add(stage.name)
+            elif reason is None:
+                print(f"[UP-TO-DATE] {stage.name}")
+            else:
+                print(f"[STALE] {stage.name}: {reason}")
+                stale.add(stage.name)
+            continue
+        if reason is None:
+            print(f"[UP-TO-DATE] {stage.name}")
+            continue
+
+        print(f"[RUN] {stage.name}: {reason}")
+        try:
+            stage.run()
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"[FAILED] {stage.name}: {e}")
+            state.save()
+            return 1
+        # keyed by the inputs it was built from; the next stages hash its outputs afresh
+        state.stages[stage.name] = {"key": stage_key(stage, inputs), "action": stage.describe(), "inputs": inputs}
+        state.save()
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuilds only the stale stages of the experiment workflow.")
+    ap.add_argument("stages", nargs="*", help="target stages (default: all); their upstream stages are included")
+    ap.add_argument("--dry-run", action="store_true", help="only report which stages are stale")
+    ap.add_argument("--force", default="", help="comma-separated stages to run even if up to date")
+    ap.add_argument("--prune", action="store_true",
+                    help="delete designs of other sweeps from the MILP outputs, batch_runner/input and the data archive")
+    ap.add_argument("--list", action="store_true", help="list the stages and exit")
+    args = ap.parse_args()
+
+    global PRUNE
+    PRUNE = args.prune
+
+    if args.list:
+        for s in STAGES:
+            print(f"{s.name:<9} {s.describe()}" + (f"  (after {', '.join(s.after)})" if s.after else ""))
+        return 0
+    force = {f for f in args.force.split(",") if f}
+    select(sorted(force))
+    return build(args.stages, force, args.dry_run)
+
+
+if __name__ == "__main__":
+    sys.exit(main())